@@ -49,10 +49,10 @@ Fact_Transactions = raw_df[['Transaction ID', 'Purchase Type', 'Payment Method',
 Fact_Transactions['Time ID'] = raw_df['time_key'].map(time_mapping)
 Fact_Transactions['Journey ID'] = raw_df['journey_key'].map(journey_mapping)
 
-# Save files
+# Save files (time_key / journey_key only build the ID mappings and are derivable, so they are not written)
 Fact_Transactions.to_csv('Fact_Transactions.csv', index=False)
-Dim_Time.to_csv('Dim_Time.csv', index=False)
-Dim_Journey.to_csv('Dim_Journey.csv', index=False)
+Dim_Time.drop(columns=['time_key']).to_csv('Dim_Time.csv', index=False)
+Dim_Journey.drop(columns=['journey_key']).to_csv('Dim_Journey.csv', index=False)
 
 print("Fact Transactions sample (showing Time ID and Journey ID):")
 print(Fact_Transactions[['Transaction ID', 'Time ID', 'Journey ID']].head())
@@ -0,0 +1,170 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Shared filtering and aggregation helpers for the dashboard callbacks.
+#
+# Each dashboard section declares the charts it needs as aggregation specs:
+#   {'by': [...], 'agg': 'count' | 'sum' | 'mean', 'name': <value column>,
+#    'sort': True/False, 'top': n, 'exclude': {column: [values]}}
+# aggregate_section() runs one group-by per distinct 'by' key set, computing
+# only the measures its charts need (size, Price sum, Price mean) together,
+# so charts on the same keys (e.g. revenue and refund counts by status and
+# refund) share a single pass. Grouping by the union of all the keys instead
+# costs more than the scans it saves once a key has many values (dates,
+# delay reasons), so each chart is grouped only by its own keys.
+
+FILTER_COLUMNS = {
+    'month': 'Month',
+    'station': 'Departure_Station_Name',
+    'ticket_type': 'Ticket_Type',
+    'railcard': 'Railcard',
+    'payment': 'Payment_Method'
+}
+
+
+def selected_filters(month=None, station=None, ticket_type=None, railcard=None, payment=None):
+    # Column -> value for the sidebar filters that are set
+    selected = {'month': month if month != 'no-data' else None, 'station': station,
+                'ticket_type': ticket_type, 'railcard': railcard, 'payment': payment}
+    return {FILTER_COLUMNS[key]: value for key, value in selected.items() if value}
+
+
+def filter_mask(df, month=None, station=None, ticket_type=None, railcard=None, payment=None):
+    # Boolean mask for the sidebar filters; None when nothing is filtered
+    mask = None
+    for column, value in selected_filters(month, station, ticket_type, railcard, payment).items():
+        if column in df.columns:
+            condition = (df[column] == value).to_numpy()
+            mask = condition if mask is None else mask & condition
+    return mask
+
+
+def build_zone_maps(df, partition_columns=('Year', 'Month')):
+    # Row ranges of the (year, month) partitions of a frame sorted by partition,
+    # with the filter values present in each one. None if the frame is not sorted.
+    columns = list(partition_columns)
+    if df.empty or any(c not in df.columns for c in columns):
+        return None
+    codes = df.groupby(columns, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1])
+    if len(starts) != codes.max() + 1:
+        return None
+    stops = np.append(starts[1:], len(df))
+
+    zone_columns = [c for c in FILTER_COLUMNS.values() if c in df.columns and c not in columns]
+    zone_maps = []
+    for start, stop in zip(starts, stops):
+        part = df.iloc[start:stop]
+        zone_maps.append({
+            'start': int(start),
+            'stop': int(stop),
+            'partition': {c: part[c].iat[0] for c in columns},
+            'values': {c: set(part[c].dropna().unique()) for c in zone_columns}
+        })
+    return zone_maps
+
+
+def zone_maps_nbytes(zone_maps):
+    # Bytes held by zone maps: the dicts and sets plus the values in them
+    # (values shared with the frame's categories are counted as well)
+    def size(value):
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(size(k) + size(v) for k, v in value.items())
+        if isinstance(value, (list, set)):
+            return sys.getsizeof(value) + sum(size(v) for v in value)
+        return sys.getsizeof(value)
+    return size(zone_maps) if zone_maps else 0
+
+
+def prune_zones(zone_maps, selected):
+    # Row ranges of the partitions that can contain rows matching `selected`
+    ranges = []
+    for zone in zone_maps:
+        if any(zone['partition'][c] != value for c, value in selected.items() if c in zone['partition']):
+            continue
+        if any(value not in zone['values'][c] for c, value in selected.items() if c in zone['values']):
+            continue
+        ranges.append((zone['start'], zone['stop']))
+    return ranges
+
+
+def filter_transactions(df, month=None, station=None, ticket_type=None, railcard=None, payment=None, zone_maps=None):
+    # Apply the sidebar filters with one combined mask instead of a copy per filter.
+    # With zone maps, only the partitions that can match are scanned.
+    if zone_maps is not None:
+        selected = selected_filters(month, station, ticket_type, railcard, payment)
+        ranges = prune_zones(zone_maps, selected) if selected else None
+        if ranges is not None and len(ranges) < len(zone_maps):
+            if len(ranges) == 1:
+                df = df.iloc[ranges[0][0]:ranges[0][1]]
+            else:
+                df = df.iloc[np.concatenate([np.arange(start, stop) for start, stop in ranges] or [np.arange(0)])]
+    mask = filter_mask(df, month, station, ticket_type, railcard, payment)
+    return df if mask is None else df[mask]
+
+
+def group_totals(df, by, measures, value_column='Price'):
+    # One group-by over the rows for the given measures, indexed by `by`
+    # (same group semantics as a plain groupby(by, observed=False) per chart)
+    # The group codes are computed once and shared by the reductions
+    grouped = df.groupby(by, observed=False)
+    totals = {}
+    if 'count' in measures or value_column not in df.columns:
+        totals['count'] = grouped.size()
+    if value_column in df.columns:
+        values = grouped[value_column]
+        if 'value_sum' in measures:
+            totals['value_sum'] = values.sum()
+        if 'value_mean' in measures:
+            totals['value_mean'] = values.mean()
+    return pd.DataFrame(totals)
+
+
+def chart_frame(totals, spec, value_column='Price'):
+    # A chart's data from the group totals of its key set
+    agg = spec.get('agg', 'count')
+    name = spec.get('name', value_column if agg != 'count' else 'Count')
+    if agg != 'count' and 'value_sum' not in totals.columns and 'value_mean' not in totals.columns:
+        return None
+
+    for column, values in spec.get('exclude', {}).items():
+        totals = totals[~totals.index.get_level_values(column).isin(values)]
+
+    if agg == 'count':
+        result = totals['count'].to_frame(name)
+    elif agg == 'sum':
+        result = totals['value_sum'].to_frame(name)
+    else:
+        result = totals['value_mean'].to_frame(name)
+
+    if spec.get('sort'):
+        result = result.sort_values(name, ascending=False)
+    if spec.get('top'):
+        result = result.head(spec['top'])
+    return result.reset_index()
+
+
+def aggregate_section(df, charts, value_column='Price'):
+    # One grouped pass per distinct key set; returns chart name -> DataFrame
+    # (None for charts whose columns are missing)
+    key_sets = {}
+    for name, spec in charts.items():
+        key_sets.setdefault(tuple(spec['by']), []).append(name)
+
+    aggregates = {}
+    for by, names in key_sets.items():
+        specs = [charts[name] for name in names]
+        if any(column not in df.columns for column in by) or any(
+                column not in by for spec in specs for column in spec.get('exclude', {})):
+            aggregates.update({name: None for name in names})
+            continue
+        measures = set()
+        for spec in specs:
+            agg = spec.get('agg', 'count')
+            measures.add({'count': 'count', 'sum': 'value_sum'}.get(agg, 'value_mean'))
+        totals = group_totals(df, list(by), measures, value_column)
+        for name, spec in zip(names, specs):
+            aggregates[name] = chart_frame(totals, spec, value_column)
+    return aggregates
@@ -1,133 +1,80 @@
+import time
+STARTUP_BEGIN = time.perf_counter()
+import os
+import tempfile
+from urllib.parse import urlencode
 import dash
-from dash import html, dcc, Input, Output, State, ctx
+from dash import html, dcc, Input, Output, State, ctx, no_update
 import dash_bootstrap_components as dbc
-import pandas as pd
-import calendar
-import plotly.express as px
-import plotly.graph_objects as go
-
-# Load Datasets with Error Handling
-try:
-    df_fact = pd.read_csv('fact_transactions.csv')
-    df_journey = pd.read_csv('dim_journey.csv')
-    df_location = pd.read_csv('dim_location.csv')
-    df_time = pd.read_csv('dim_time.csv')
-except FileNotFoundError as e:
-    print(f"Error: {e}")
-    df_fact = pd.DataFrame()
-    df_journey = pd.DataFrame()
-    df_location = pd.DataFrame()
-    df_time = pd.DataFrame()
-
-# Strip whitespace from column names
-df_fact.columns = df_fact.columns.str.strip()
-df_journey.columns = df_journey.columns.str.strip()
-df_location.columns = df_location.columns.str.strip()
-df_time.columns = df_time.columns.str.strip()
-
-# Print columns and Time_ID types for debugging
-print("fact_transactions columns:", df_fact.columns.tolist())
-print("dim_journey columns:", df_journey.columns.tolist())
-print("dim_location columns:", df_location.columns.tolist())
-print("dim_time columns:", df_time.columns.tolist())
-if 'Time_ID' in df_fact.columns:
-    print("fact_transactions Time_ID dtype:", df_fact['Time_ID'].dtype)
-if 'Time_ID' in df_time.columns:
-    print("dim_time Time_ID dtype:", df_time['Time_ID'].dtype)
-if 'Railcard' in df_fact.columns:
-    print("Unique Railcard values:", df_fact['Railcard'].unique().tolist())
-
-# Check if df_fact is empty
-if df_fact.empty:
-    print("Warning: df_fact is empty. Check if CSV files exist and are correctly formatted.")
-
-# Optimize memory for categorical columns
-categorical_columns = ['Purchase_Type', 'Payment_Method', 'Railcard', 'Ticket_Class', 'Ticket_Type', 'Journey_Status', 'Refund_Request']
-for col in categorical_columns:
-    if col in df_fact.columns:
-        try:
-            df_fact[col] = df_fact[col].astype('category')
-        except Exception as e:
-            print(f"Warning: Could not convert {col} to category: {e}")
-if 'Station_Name' in df_location.columns:
-    df_location['Station_Name'] = df_location['Station_Name'].astype('category')
-
-# Preprocess data
-if not df_fact.empty:
-    # Ensure Transaction_ID and Time_ID are strings
-    if 'Transaction_ID' in df_fact.columns:
-        df_fact['Transaction_ID'] = df_fact['Transaction_ID'].astype(str)
-    if 'Time_ID' in df_fact.columns:
-        df_fact['Time_ID'] = df_fact['Time_ID'].astype(str)
-        print("fact_transactions Time_ID dtype after conversion:", df_fact['Time_ID'].dtype)
-    
-    # Merge with dim_time to get Purchase_Date and Hour_of_Day
-    if not df_time.empty and 'Time_ID' in df_fact.columns and 'Time_ID' in df_time.columns:
-        df_time['Time_ID'] = df_time['Time_ID'].astype(str)
-        print("dim_time Time_ID dtype after conversion:", df_time['Time_ID'].dtype)
-        df_fact = df_fact.merge(
-            df_time[['Time_ID', 'Month', 'Year', 'Purchase_Date', 'Hour_of_Day']],
-            on='Time_ID',
-            how='left'
-        )
-        print("After dim_time merge, df_fact shape:", df_fact.shape)
-        print("Sample Purchase_Date:", df_fact['Purchase_Date'].head().tolist())
-        print("Sample Hour_of_Day:", df_fact['Hour_of_Day'].head().tolist())
-    else:
-        print("Warning: dim_time merge skipped; Time_ID not found or df_time is empty.")
-    
-    # Merge with dim_journey
-    if not df_journey.empty and 'Journey_ID' in df_fact.columns:
-        df_fact = df_fact.merge(
-            df_journey[['Journey_ID', 'Journey_Date', 'Delay_Period', 'Reason_for_Delay']],
-            on='Journey_ID',
-            how='left'
-        )
-        print("After dim_journey merge, df_fact shape:", df_fact.shape)
-        print("df_fact columns after dim_journey merge:", df_fact.columns.tolist())
-    
-    # Merge with dim_location for Departure and Arrival stations
-    if not df_location.empty and 'Departure_Station_ID' in df_fact.columns:
-        df_fact = df_fact.merge(
-            df_location[['Station_ID', 'Station_Name']],
-            left_on='Departure_Station_ID',
-            right_on='Station_ID',
-            how='left'
-        ).rename(columns={'Station_Name': 'Departure_Station_Name'}).drop(columns=['Station_ID'], errors='ignore')
-        print("After departure dim_location merge, df_fact shape:", df_fact.shape)
-    
-    if not df_location.empty and 'Arrival_Station_ID' in df_fact.columns:
-        df_fact = df_fact.merge(
-            df_location[['Station_ID', 'Station_Name']],
-            left_on='Arrival_Station_ID',
-            right_on='Station_ID',
-            how='left'
-        ).rename(columns={'Station_Name': 'Arrival_Station_Name'}).drop(columns=['Station_ID'], errors='ignore')
-        print("After arrival dim_location merge, df_fact shape:", df_fact.shape)
-        print("df_fact columns after all merges:", df_fact.columns.tolist())
-
-    # Ensure Purchase_Date and Journey_Date are datetime
-    if 'Purchase_Date' in df_fact.columns:
-        invalid_dates = df_fact['Purchase_Date'][df_fact['Purchase_Date'].isna()]
-        if not invalid_dates.empty:
-            print("Warning: Invalid Purchase_Date values found:", invalid_dates.head().tolist())
-        df_fact['Purchase_Date'] = pd.to_datetime(df_fact['Purchase_Date'], errors='coerce')
-        df_fact['Month'] = df_fact['Purchase_Date'].dt.month
-        print("Sample Purchase_Date after datetime conversion:", df_fact['Purchase_Date'].head().tolist())
-    
-    if 'Journey_Date' in df_fact.columns:
-        invalid_journey_dates = df_fact['Journey_Date'][df_fact['Journey_Date'].isna()]
-        if not invalid_journey_dates.empty:
-            print("Warning: Invalid Journey_Date values found:", invalid_journey_dates.head().tolist())
-        df_fact['Journey_Date'] = pd.to_datetime(df_fact['Journey_Date'], errors='coerce')
-        print("Sample Journey_Date after datetime conversion:", df_fact['Journey_Date'].head().tolist())
-
-# Month options for dropdown
-month_options = [{'label': calendar.month_name[m], 'value': m} for m in sorted(df_fact['Month'].unique()) if pd.notna(m)] if 'Month' in df_fact.columns else [{'label': 'No Data', 'value': 'no-data'}]
+from flask import Response, jsonify, request, stream_with_context
+from data_loader import DROPDOWN_COLUMNS
+from dataset_registry import CONFIG_FILE, DatasetRegistry, read_config
+from payloads import PayloadStats, install as install_payload_hooks, loads
+from result_cache import ResultCache, cache_key
+
+# Startup phases in seconds, reported at /startup-report
+STARTUP_TIMINGS = {'imports': time.perf_counter() - STARTUP_BEGIN}
+
+# Shared chart result cache: one SQLite file used by every server process on the machine
+CACHE_ENABLED = os.environ.get('DASHBOARD_CACHE', '1') == '1'
+CACHE_PATH = os.environ.get('DASHBOARD_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'uk_train_dashboard', 'results.sqlite'))
+CACHE_MAX_MB = float(os.environ.get('DASHBOARD_CACHE_MB', '256'))
+CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', '3600'))
+result_cache = ResultCache(CACHE_PATH, max_bytes=int(CACHE_MAX_MB * 2**20), ttl=CACHE_TTL) if CACHE_ENABLED else None
+
+# Compress JSON responses above DASHBOARD_COMPRESS_MIN bytes (gzip, or brotli when installed)
+COMPRESS_ENABLED = os.environ.get('DASHBOARD_COMPRESS', '1') == '1'
+COMPRESS_MIN_BYTES = int(os.environ.get('DASHBOARD_COMPRESS_MIN', '1024'))
+
+# Background callbacks: chart computations run as jobs on a fixed pool of DASHBOARD_BACKGROUND_WORKERS
+# worker processes (background_jobs.py). When a newer filter state arrives from the same page, the
+# job for the older one is dropped if it has not started. This bounds the work a burst of filter
+# clicks can queue; it is not a speedup (each job adds a polling round trip, and every worker holds
+# its own copy of the datasets it serves), so it is off by default.
+BACKGROUND_ENABLED = os.environ.get('DASHBOARD_BACKGROUND', '0') == '1'
+BACKGROUND_PATH = os.environ.get('DASHBOARD_BACKGROUND_PATH', os.path.join(tempfile.gettempdir(), 'uk_train_dashboard', 'jobs'))
+BACKGROUND_WORKERS = int(os.environ.get('DASHBOARD_BACKGROUND_WORKERS', '2'))
+background_manager = None
+if BACKGROUND_ENABLED:
+    try:
+        import diskcache
+        from background_jobs import JobPoolManager
+        background_manager = JobPoolManager(diskcache.Cache(BACKGROUND_PATH), module=os.path.splitext(os.path.basename(__file__))[0],
+                                            workers=BACKGROUND_WORKERS)
+        # Start the workers now, except in the debug reloader's file-watching process (python app.py),
+        # which never serves callbacks
+        if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            background_manager.start()
+    except ImportError:
+        print("Warning: diskcache is not installed; chart callbacks run in the request thread (pip install \"dash[diskcache]\").")
+
+# Fast start: serve the layout shell immediately and load the data in a background thread
+FAST_START = os.environ.get('DASHBOARD_FAST_START', '0') == '1'
+
+# Datasets: one star schema per operator/region (datasets.json), selected per browser session.
+# Each loads on first use and is evicted when idle or when the memory budget needs room.
+DATASETS_CONFIG = os.environ.get('DASHBOARD_DATASETS', CONFIG_FILE)
+MEMORY_BUDGET_MB = float(os.environ.get('DASHBOARD_MEMORY_MB', '2048'))
+IDLE_SECONDS = float(os.environ.get('DASHBOARD_IDLE_SECONDS', '1800'))
+
+# Load Datasets
+phase_start = time.perf_counter()
+registry = DatasetRegistry(read_config(DATASETS_CONFIG),
+                           memory_budget=int(MEMORY_BUDGET_MB * 2**20), idle_seconds=IDLE_SECONDS)
+# In fast-start mode precomputed dropdown options are shown while the tables load in the background.
+# No reference to the Dataset is kept here, so an evicted dataset's memory is actually freed.
+initial_options = registry.get(wait=not FAST_START).options or {}
+registry.start_reaper()
+STARTUP_TIMINGS['load_data' if not FAST_START else 'start_loader'] = time.perf_counter() - phase_start
+phase_start = time.perf_counter()
 
 # Initialize Dash App
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], background_callback_manager=background_manager)
 app.title = "UK Train Rides Analysis"
+payload_stats = PayloadStats()
+install_payload_hooks(app.server, compress=COMPRESS_ENABLED, min_bytes=COMPRESS_MIN_BYTES, stats=payload_stats)
+STARTUP_TIMINGS['app_init'] = time.perf_counter() - phase_start
+phase_start = time.perf_counter()
 
 # App Layout
 app.layout = html.Div([
@@ -178,41 +125,56 @@ app.layout = html.Div([
                 'border': 'none'
             }),
             html.H5("Filters", style={'textAlign': 'center'}),
+            html.Label("Dataset:", style={'marginTop': '20px'}),
+            dcc.Dropdown(
+                id='dataset-select',
+                options=registry.options(),
+                value=registry.default,
+                clearable=False,
+                persistence=True,
+                persistence_type='session'
+            ),
             html.Label("Month:", style={'marginTop': '20px'}),
             dcc.Dropdown(
                 id='filter-month',
-                options=month_options,
+                options=initial_options.get('filter-month', []),
                 placeholder="Select month",
                 clearable=True
             ),
             html.Label("Station Name:", style={'marginTop': '20px'}),
             dcc.Dropdown(
                 id='filter-station',
-                options=[{'label': s, 'value': s} for s in sorted(df_fact['Departure_Station_Name'].unique()) if pd.notna(s)] if 'Departure_Station_Name' in df_fact.columns else [],
+                options=initial_options.get('filter-station', []),
                 placeholder="Select station",
                 clearable=True
             ),
             html.Label("Ticket Type:", style={'marginTop': '20px'}),
             dcc.Dropdown(
                 id='filter-ticket-type',
-                options=[{'label': t, 'value': t} for t in df_fact['Ticket_Type'].unique() if pd.notna(t)] if 'Ticket_Type' in df_fact.columns else [],
+                options=initial_options.get('filter-ticket-type', []),
                 placeholder="Select ticket type",
                 clearable=True
             ),
             html.Label("Railcard:", style={'marginTop': '20px'}),
             dcc.Dropdown(
                 id='filter-railcard',
-                options=[{'label': r, 'value': r} for r in df_fact['Railcard'].unique() if pd.notna(r)] if 'Railcard' in df_fact.columns else [],
+                options=initial_options.get('filter-railcard', []),
                 placeholder="Select railcard",
                 clearable=True
             ),
             html.Label("Payment Method:", style={'marginTop': '20px'}),
             dcc.Dropdown(
                 id='filter-payment',
-                options=[{'label': p, 'value': p} for p in df_fact['Payment_Method'].unique() if pd.notna(p)] if 'Payment_Method' in df_fact.columns else [],
+                options=initial_options.get('filter-payment', []),
                 placeholder="Select payment method",
                 clearable=True
             ),
+            html.Label("Export filtered rows:", style={'marginTop': '20px'}),
+            html.Div([
+                html.A("CSV", id='export-csv', href='/export?format=csv', style={'marginRight': '15px'}),
+                html.A("CSV (gzip)", id='export-csv-gz', href='/export?format=csv.gz', style={'marginRight': '15px'}),
+                html.A("Parquet", id='export-parquet', href='/export?format=parquet')
+            ]),
         ], style={'padding': '20px'})
     ], style={
         'position': 'fixed',
@@ -239,10 +201,35 @@ app.layout = html.Div([
         'zIndex': '999'
     }),
 
+    # Readiness of the dataset (polled while it loads in the background)
+    # (re-enabled by the chart and KPI callbacks whenever they find their dataset loading again)
+    dcc.Store(id='data-ready', data=registry.get().ready.is_set()),
+    dcc.Interval(id='data-ready-poll', interval=500, disabled=registry.get().ready.is_set()),
+
     # Dashboard Sections
     html.Div(id='page-content', children=[
+        # KPI cards for the filters and purchase-date period
+        dbc.Row([
+            dbc.Col(dbc.Card(dbc.CardBody([
+                html.Small("Total Revenue"), html.H5(id='kpi-revenue', className='mb-0')
+            ], className='py-2')), width=3),
+            dbc.Col(dbc.Card(dbc.CardBody([
+                html.Small("Transactions"), html.H5(id='kpi-transactions', className='mb-0')
+            ], className='py-2')), width=3),
+            dbc.Col(dbc.Card(dbc.CardBody([
+                html.Small("Refund Rate"), html.H5(id='kpi-refund-rate', className='mb-0')
+            ], className='py-2')), width=3),
+            dbc.Col([
+                html.Small("Period (purchase date):"),
+                dcc.DatePickerRange(id='kpi-period', clearable=True, display_format='DD MMM YYYY')
+            ], width=3)
+        ], className="mb-2"),
+
         # Overview Section
         html.Div([
+            # Shown while the section's charts are being computed
+            dbc.Progress(id='progress-overview', value=100, striped=True, animated=True, className='mb-1',
+                         style={'height': '4px', 'display': 'none'}),
             # Row 1: Transactions by Hour, Revenue by Ticket Type
             dbc.Row([
                 dbc.Col([
@@ -265,6 +252,9 @@ app.layout = html.Div([
 
         # Revenue Section
         html.Div([
+            # Shown while the section's charts are being computed
+            dbc.Progress(id='progress-revenue', value=100, striped=True, animated=True, className='mb-1',
+                         style={'height': '4px', 'display': 'none'}),
             # Row 1: Daily Revenue
             dbc.Row([
                 dbc.Col([
@@ -284,6 +274,9 @@ app.layout = html.Div([
 
         # Journey Section
         html.Div([
+            # Shown while the section's charts are being computed
+            dbc.Progress(id='progress-journey', value=100, striped=True, animated=True, className='mb-1',
+                         style={'height': '4px', 'display': 'none'}),
             # Row 1: Delay Reasons, Railcard Usage
             dbc.Row([
                 dbc.Col([
@@ -306,6 +299,9 @@ app.layout = html.Div([
 
         # Performance Section
         html.Div([
+            # Shown while the section's charts are being computed
+            dbc.Progress(id='progress-performance', value=100, striped=True, animated=True, className='mb-1',
+                         style={'height': '4px', 'display': 'none'}),
             # Row 1: Revenue Impact of Refund Requests, Refund Request Proportion
             dbc.Row([
                 dbc.Col([
@@ -338,8 +334,106 @@ app.layout = html.Div([
     'boxSizing': 'border-box'
 })
 
+STARTUP_TIMINGS['layout'] = time.perf_counter() - phase_start
+print("Startup time breakdown (s):", {k: round(v, 3) for k, v in STARTUP_TIMINGS.items()})
+
+# --- Readiness and startup report ---
+
+@app.server.route('/ready')
+def readiness():
+    # Readiness of the default dataset (or ?dataset=<name>)
+    dataset = registry.get(request.args.get('dataset'))
+    status = {'ready': dataset.df_fact is not None, 'loading': not dataset.ready.is_set(), 'error': dataset.error}
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.server.route('/startup-report')
+def startup_report():
+    # Timings of the default dataset (or ?dataset=<name>) as currently loaded
+    dataset = registry.get(request.args.get('dataset'))
+    return jsonify({
+        'fast_start': FAST_START,
+        'startup': {k: round(v, 4) for k, v in STARTUP_TIMINGS.items()},
+        'dataset': {k: round(v, 4) for k, v in dataset.timings.items()},
+        'memory': dataset.memory,
+        'ready': dataset.df_fact is not None
+    })
+
+@app.server.route('/datasets')
+def datasets_report():
+    # Loaded/loading state, memory charge and idle time of every registered dataset
+    return jsonify({'memory_budget_bytes': registry.memory_budget, 'idle_seconds': registry.idle_seconds,
+                    'datasets': registry.status()})
+
+@app.server.route('/cache-stats')
+def cache_stats():
+    return jsonify(result_cache.stats() if result_cache else {'enabled': False})
+
+@app.server.route('/payload-stats')
+def payload_stats_report():
+    # Mean response bytes per callback output, uncompressed and as sent
+    return jsonify({'compress': COMPRESS_ENABLED, 'min_bytes': COMPRESS_MIN_BYTES, 'outputs': payload_stats.summary()})
+
 # --- Callbacks ---
 
+# Poll until the selected dataset is loaded, then fill the dropdowns and redraw the charts
+@app.callback(
+    [Output('data-ready', 'data'), Output('data-ready-poll', 'disabled')] +
+    [Output(dropdown_id, 'options') for dropdown_id in DROPDOWN_COLUMNS],
+    [Input('data-ready-poll', 'n_intervals'), Input('dataset-select', 'value')],
+    prevent_initial_call=True
+)
+def poll_data_ready(n_intervals, dataset_name=None):
+    dataset = registry.get(dataset_name)
+    options = dataset.options or {}
+    if not dataset.ready.is_set():
+        # Keep polling; precomputed options (if any) are shown meanwhile
+        return False, False, *[options.get(dropdown_id, []) if options else no_update for dropdown_id in DROPDOWN_COLUMNS]
+    return True, True, *[options.get(dropdown_id, []) for dropdown_id in DROPDOWN_COLUMNS]
+
+# Chart helpers shared by the section callbacks
+def loading_figure(message):
+    # Plain figure dict, so plotly is not needed before the data is ready
+    return {'data': [], 'layout': {'title': {'text': message, 'x': 0.5},
+                                   'xaxis': {'visible': False}, 'yaxis': {'visible': False}}}
+
+def build_section_figures(dataset, section, filters):
+    # pandas/plotly are imported with the figure builders on first use, not at startup
+    from aggregations import filter_transactions
+    from figures import SECTION_BUILDERS, indexed_aggregates
+    filtered_df = filter_transactions(dataset.df_fact, *filters, zone_maps=dataset.zone_maps)
+    # Daily series come from the prefix-sum indexes rather than a group-by on the rows
+    return SECTION_BUILDERS[section](filtered_df, indexed_aggregates(section, dataset.time_indexes, filters))
+
+def section_figures(dataset, section, filters):
+    # Figures come from the shared cache when another request (or worker) already built them;
+    # either way they are sent as the compact JSON from figures_to_json()
+    from figures import figures_to_json
+    compute = lambda: figures_to_json(build_section_figures(dataset, section, filters))
+    if result_cache is None:
+        return loads(compute())
+    key = cache_key('section', dataset.data_dir, section, filters)
+    return loads(result_cache.get_or_compute(key, dataset.version, compute))
+
+def background_options(section):
+    # Callback arguments for a section's chart callbacks: a progress bar while they run and,
+    # with a background manager, execution as a cancellable background job polled every 200 ms
+    options = {'running': [(Output(f'progress-{section}', 'style'), {'height': '4px', 'display': 'flex'},
+                            {'height': '4px', 'display': 'none'})]}
+    if background_manager is not None:
+        options.update(background=True, interval=200)
+    return options
+
+def update_section(section, chart_count, filters, dataset_name=None):
+    # Returns the figures and data-ready-poll.disabled
+    dataset = registry.get(dataset_name)
+    if dataset.df_fact is None:
+        if not dataset.ready.is_set():
+            # (Re)loading, e.g. after an idle eviction: poll until it is ready, which redraws the charts
+            return *[loading_figure("Loading data...")] * chart_count, False
+        return *[loading_figure("Data could not be loaded")] * chart_count, no_update
+    return *section_figures(dataset, section, filters), no_update
+
+
 # Toggle Filters Sidebar
 @app.callback(
     [Output('filters-sidebar', 'style'), Output('overlay', 'style')],
@@ -363,6 +457,54 @@ def toggle_sidebar(open_clicks, close_clicks, overlay_clicks):
             {'display': 'none'}
         )
 
+# Point the export links at the current filter state
+@app.callback(
+    [Output('export-csv', 'href'), Output('export-csv-gz', 'href'), Output('export-parquet', 'href')],
+    [
+        Input('filter-month', 'value'),
+        Input('filter-station', 'value'),
+        Input('filter-ticket-type', 'value'),
+        Input('filter-railcard', 'value'),
+        Input('filter-payment', 'value'),
+        Input('dataset-select', 'value')
+    ]
+)
+def update_export_links(month, station, ticket_type, railcard, payment, dataset_name=None):
+    selected = {'dataset': dataset_name, 'month': month, 'station': station, 'ticket_type': ticket_type,
+                'railcard': railcard, 'payment': payment}
+    query = {key: value for key, value in selected.items() if value}
+    return tuple(f"/export?{urlencode({**query, 'format': export_format})}" for export_format in ['csv', 'csv.gz', 'parquet'])
+
+# Stream the filtered, joined rows behind the charts
+@app.server.route('/export')
+def export_transactions():
+    export_format = request.args.get('format', 'csv')
+    from export import EXPORT_FORMATS, iter_export, missing_dependency
+    dataset = registry.get(request.args.get('dataset'))
+    if dataset.df_fact is None:
+        return Response("Data is still loading", status=503)
+    if export_format not in EXPORT_FORMATS:
+        return Response(f"Unknown export format: {export_format}", status=400)
+    missing = missing_dependency(export_format)
+    if missing:
+        return Response(f"{export_format} export needs {missing} (pip install {missing})", status=501)
+    month = request.args.get('month')
+    if month is not None:
+        # A malformed month must not fall back to exporting every month
+        try:
+            month = int(month)
+        except ValueError:
+            pass
+        if not isinstance(month, int) or not 1 <= month <= 12:
+            return Response(f"Invalid month: {month} (expected 1-12)", status=400)
+    filters = [month] + [request.args.get(key) for key in ['station', 'ticket_type', 'railcard', 'payment']]
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    return Response(
+        stream_with_context(iter_export(dataset.df_fact, filters, export_format, dataset.zone_maps)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=uk_train_transactions.{extension}'}
+    )
+
 # Update active nav item and section visibility
 @app.callback(
     [Output('main-nav', 'children'),
@@ -397,258 +539,46 @@ def update_section_visibility(*args):
         Output('chart-transactions-hour', 'figure'),
         Output('chart-revenue-ticket', 'figure'),
         Output('chart-daily-transactions', 'figure'),
-        Output('chart-journey-status', 'figure')
+        Output('chart-journey-status', 'figure'),
+        Output('data-ready-poll', 'disabled', allow_duplicate=True)
     ],
     [
         Input('filter-month', 'value'),
         Input('filter-station', 'value'),
         Input('filter-ticket-type', 'value'),
         Input('filter-railcard', 'value'),
-        Input('filter-payment', 'value')
-    ]
+        Input('filter-payment', 'value'),
+        Input('data-ready', 'data'),
+        Input('dataset-select', 'value')
+    ],
+    prevent_initial_call='initial_duplicate',
+    **background_options('overview')
 )
-def update_overview_charts(month, station, ticket_type, railcard, payment):
-    # Filter dataframe
-    filtered_df = df_fact.copy()
-    if month and 'Month' in filtered_df.columns and month != 'no-data':
-        filtered_df = filtered_df[filtered_df['Month'] == month]
-    if station and 'Departure_Station_Name' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Departure_Station_Name'] == station]
-    if ticket_type and 'Ticket_Type' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Ticket_Type'] == ticket_type]
-    if railcard and 'Railcard' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Railcard'] == railcard]
-    if payment and 'Payment_Method' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Payment_Method'] == payment]
-
-    # Debug: Print filtered dataframe info
-    print(f"Filtered dataframe shape: {filtered_df.shape}")
-    print(f"Filtered dataframe columns: {filtered_df.columns.tolist()}")
-    if not filtered_df.empty:
-        if 'Purchase_Date' in filtered_df.columns:
-            print(f"Sample Purchase_Date: {filtered_df['Purchase_Date'].head().tolist()}")
-        if 'Hour_of_Day' in filtered_df.columns:
-            print(f"Sample Hour_of_Day: {filtered_df['Hour_of_Day'].head().tolist()}")
-
-    # Handle empty dataframe
-    if filtered_df.empty:
-        empty_fig = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-        return empty_fig, empty_fig, empty_fig, empty_fig
-
-    # Chart 1: Transactions by Hour of Day
-    if 'Hour_of_Day' in filtered_df.columns:
-        transactions_hour = filtered_df.groupby('Hour_of_Day', observed=False).size().reset_index(name='Number of Transactions')
-    else:
-        transactions_hour = pd.DataFrame({'Hour_of_Day': range(24), 'Number of Transactions': [0]*24})
-        print("Warning: Hour_of_Day not in filtered_df; using fallback data.")
-    fig1 = px.line(
-        transactions_hour,
-        x='Hour_of_Day',
-        y='Number of Transactions',
-        title='Number of Transactions by Hour of Day',
-        markers=True,
-        line_shape='linear',
-        template='plotly_white'
-    )
-    fig1.update_layout(
-        xaxis_title='Hour of Day',
-        yaxis_title='Number of Transactions',
-        showlegend=False,
-        xaxis=dict(tickmode='linear', tick0=0, dtick=1),
-        plot_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    # Chart 2: Revenue by Ticket Type
-    if 'Ticket_Type' in filtered_df.columns and 'Price' in filtered_df.columns:
-        ticket_type_revenue = filtered_df.groupby('Ticket_Type', observed=False)['Price'].sum().reset_index()
-    else:
-        ticket_type_revenue = pd.DataFrame({'Ticket_Type': [], 'Price': []})
-        print("Warning: Ticket_Type or Price not in filtered_df.")
-    fig2 = px.bar(
-        ticket_type_revenue,
-        x='Ticket_Type',
-        y='Price',
-        title='Revenue by Ticket Type',
-        template='plotly_white'
-    )
-    fig2.update_layout(
-        xaxis_title='Ticket Type',
-        yaxis_title='Revenue ($)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    # Chart 3: Daily Number of Transactions
-    if 'Purchase_Date' in filtered_df.columns:
-        daily_transactions = filtered_df.groupby('Purchase_Date', observed=False).size().reset_index(name='Number of Transactions')
-    else:
-        daily_transactions = pd.DataFrame({'Purchase_Date': [], 'Number of Transactions': []})
-        print("Warning: Purchase_Date not in filtered_df; using fallback data.")
-    fig3 = px.line(
-        daily_transactions,
-        x='Purchase_Date',
-        y='Number of Transactions',
-        title='Daily Number of Transactions',
-        template='plotly_white'
-    )
-    fig3.update_layout(
-        xaxis_title='Date',
-        yaxis_title='Number of Transactions',
-        xaxis_tickformat='%b %d',
-        plot_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    # Chart 4: Journey Status Distribution
-    if 'Journey_Status' in filtered_df.columns:
-        journey_status_dist = filtered_df['Journey_Status'].value_counts().reset_index()
-        journey_status_dist.columns = ['Journey_Status', 'Count']
-    else:
-        journey_status_dist = pd.DataFrame({'Journey_Status': [], 'Count': []})
-        print("Warning: Journey_Status not in filtered_df.")
-    fig4 = px.pie(
-        journey_status_dist,
-        names='Journey_Status',
-        values='Count',
-        title='Journey Status Distribution',
-        hole=0.5,
-        template='plotly_white'
-    )
-    fig4.update_traces(textinfo='percent+label', pull=[0.05]*len(journey_status_dist))
-    fig4.update_layout(
-        showlegend=True,
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=10, r=10, t=80, b=10)
-    )
-
-    return fig1, fig2, fig3, fig4
+def update_overview_charts(month, station, ticket_type, railcard, payment, data_ready=None, dataset_name=None):
+    return update_section('overview', 4, [month, station, ticket_type, railcard, payment], dataset_name)
 
 # Update Revenue Charts
 @app.callback(
     [
         Output('chart-daily-revenue', 'figure'),
         Output('chart-ticket-class-revenue', 'figure'),
-        Output('chart-station-revenue', 'figure')
+        Output('chart-station-revenue', 'figure'),
+        Output('data-ready-poll', 'disabled', allow_duplicate=True)
     ],
     [
         Input('filter-month', 'value'),
         Input('filter-station', 'value'),
         Input('filter-ticket-type', 'value'),
         Input('filter-railcard', 'value'),
-        Input('filter-payment', 'value')
-    ]
+        Input('filter-payment', 'value'),
+        Input('data-ready', 'data'),
+        Input('dataset-select', 'value')
+    ],
+    prevent_initial_call='initial_duplicate',
+    **background_options('revenue')
 )
-def update_revenue_charts(month, station, ticket_type, railcard, payment):
-    # Filter dataframe
-    filtered_df = df_fact.copy()
-    if month and 'Month' in filtered_df.columns and month != 'no-data':
-        filtered_df = filtered_df[filtered_df['Month'] == month]
-    if station and 'Departure_Station_Name' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Departure_Station_Name'] == station]
-    if ticket_type and 'Ticket_Type' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Ticket_Type'] == ticket_type]
-    if railcard and 'Railcard' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Railcard'] == railcard]
-    if payment and 'Payment_Method' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Payment_Method'] == payment]
-
-    # Debug: Print filtered dataframe info
-    print(f"Revenue charts - Filtered dataframe shape: {filtered_df.shape}")
-    print(f"Revenue charts - Filtered dataframe columns: {filtered_df.columns.tolist()}")
-    if not filtered_df.empty:
-        if 'Journey_Date' in filtered_df.columns:
-            print(f"Revenue charts - Sample Journey_Date: {filtered_df['Journey_Date'].head().tolist()}")
-        if 'Ticket_Class' in filtered_df.columns:
-            print(f"Revenue charts - Sample Ticket_Class: {filtered_df['Ticket_Class'].head().tolist()}")
-        if 'Departure_Station_Name' in filtered_df.columns:
-            print(f"Revenue charts - Sample Departure_Station_Name: {filtered_df['Departure_Station_Name'].head().tolist()}")
-
-    # Handle empty dataframe
-    if filtered_df.empty:
-        empty_fig = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-        return empty_fig, empty_fig, empty_fig
-
-    # Chart 1: Daily Revenue
-    if 'Journey_Date' in filtered_df.columns and 'Price' in filtered_df.columns:
-        daily_revenue = filtered_df.groupby('Journey_Date', observed=False)['Price'].sum().reset_index(name='Daily Revenue')
-    else:
-        daily_revenue = pd.DataFrame({'Journey_Date': [], 'Daily Revenue': []})
-        print("Warning: Journey_Date or Price not in filtered_df; using fallback data.")
-    fig1 = px.line(
-        daily_revenue,
-        x='Journey_Date',
-        y='Daily Revenue',
-        title='Daily Revenue',
-        template='plotly_white'
-    )
-    fig1.update_layout(
-        xaxis_title='Date',
-        yaxis_title='Revenue ($)',
-        xaxis_tickformat='%b %d',
-        plot_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40),
-        showlegend=False
-    )
-
-    # Chart 2: Revenue Distribution by Ticket Class
-    if 'Ticket_Class' in filtered_df.columns and 'Price' in filtered_df.columns:
-        ticket_class_revenue = filtered_df.groupby('Ticket_Class', observed=False)['Price'].sum().reset_index()
-    else:
-        ticket_class_revenue = pd.DataFrame({'Ticket_Class': [], 'Price': []})
-        print("Warning: Ticket_Class or Price not in filtered_df.")
-    fig2 = px.pie(
-        ticket_class_revenue,
-        names='Ticket_Class',
-        values='Price',
-        title='Revenue Distribution by Ticket Class',
-        template='plotly_white'
-    )
-    fig2.update_traces(textinfo='percent+label')
-    fig2.update_layout(
-        showlegend=True,
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    # Chart 3: Revenue by Departure Station (Top 5)
-    if 'Departure_Station_Name' in filtered_df.columns and 'Price' in filtered_df.columns:
-        station_revenue = filtered_df.groupby('Departure_Station_Name', observed=False)['Price'].sum().sort_values(ascending=False).head(5).reset_index()
-    else:
-        station_revenue = pd.DataFrame({'Departure_Station_Name': [], 'Price': []})
-        print("Warning: Departure_Station_Name or Price not in filtered_df.")
-    fig3 = px.bar(
-        station_revenue,
-        x='Price',
-        y='Departure_Station_Name',
-        title='Revenue by Departure Station',
-        template='plotly_white'
-    )
-    fig3.update_layout(
-        xaxis_title='Revenue',
-        yaxis_title='Station',
-        plot_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    return fig1, fig2, fig3
+def update_revenue_charts(month, station, ticket_type, railcard, payment, data_ready=None, dataset_name=None):
+    return update_section('revenue', 3, [month, station, ticket_type, railcard, payment], dataset_name)
 
 # Update Journey Charts
 @app.callback(
@@ -656,281 +586,74 @@ def update_revenue_charts(month, station, ticket_type, railcard, payment):
         Output('chart-delay-reasons', 'figure'),
         Output('chart-railcard-usage', 'figure'),
         Output('chart-avg-price-ticket', 'figure'),
-        Output('chart-purchase-type', 'figure')
+        Output('chart-purchase-type', 'figure'),
+        Output('data-ready-poll', 'disabled', allow_duplicate=True)
     ],
     [
         Input('filter-month', 'value'),
         Input('filter-station', 'value'),
         Input('filter-ticket-type', 'value'),
         Input('filter-railcard', 'value'),
-        Input('filter-payment', 'value')
-    ]
+        Input('filter-payment', 'value'),
+        Input('data-ready', 'data'),
+        Input('dataset-select', 'value')
+    ],
+    prevent_initial_call='initial_duplicate',
+    **background_options('journey')
 )
-def update_journey_charts(month, station, ticket_type, railcard, payment):
-    # Filter dataframe
-    filtered_df = df_fact.copy()
-    if month and 'Month' in filtered_df.columns and month != 'no-data':
-        filtered_df = filtered_df[filtered_df['Month'] == month]
-    if station and 'Departure_Station_Name' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Departure_Station_Name'] == station]
-    if ticket_type and 'Ticket_Type' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Ticket_Type'] == ticket_type]
-    if railcard and 'Railcard' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Railcard'] == railcard]
-    if payment and 'Payment_Method' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Payment_Method'] == payment]
-
-    # Debug: Print filtered dataframe info
-    print(f"Journey charts - Filtered dataframe shape: {filtered_df.shape}")
-    print(f"Journey charts - Filtered dataframe columns: {filtered_df.columns.tolist()}")
-    if not filtered_df.empty:
-        if 'Reason_for_Delay' in filtered_df.columns:
-            print(f"Journey charts - Sample Reason_for_Delay: {filtered_df['Reason_for_Delay'].head().tolist()}")
-        if 'Railcard' in filtered_df.columns:
-            print(f"Journey charts - Sample Railcard: {filtered_df['Railcard'].head().tolist()}")
-        if 'Ticket_Type' in filtered_df.columns:
-            print(f"Journey charts - Sample Ticket_Type: {filtered_df['Ticket_Type'].head().tolist()}")
-        if 'Purchase_Type' in filtered_df.columns:
-            print(f"Journey charts - Sample Purchase_Type: {filtered_df['Purchase_Type'].head().tolist()}")
-
-    # Handle empty dataframe
-    if filtered_df.empty:
-        empty_fig = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-        return empty_fig, empty_fig, empty_fig, empty_fig
-
-    # Chart 1: Delay Reasons (excluding 'No Delay')
-    if 'Reason_for_Delay' in filtered_df.columns:
-        delay_reasons = filtered_df[filtered_df['Reason_for_Delay'] != 'No Delay']['Reason_for_Delay'].value_counts().reset_index()
-        delay_reasons.columns = ['Reason', 'Count']
-    else:
-        delay_reasons = pd.DataFrame({'Reason': [], 'Count': []})
-        print("Warning: Reason_for_Delay not in filtered_df.")
-    fig1 = px.bar(
-        delay_reasons,
-        x='Count',
-        y='Reason',
-        title='Delay Reasons',
-        template='plotly_white'
-    )
-    fig1.update_layout(
-        xaxis_title='Count',
-        yaxis_title='Reason',
-        plot_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    # Chart 2: Railcard Usage
-    if 'Railcard' in filtered_df.columns:
-        railcard_usage = filtered_df['Railcard'].value_counts().reset_index()
-        railcard_usage.columns = ['Railcard Type', 'Number of Transactions']
-    else:
-        railcard_usage = pd.DataFrame({'Railcard Type': [], 'Number of Transactions': []})
-        print("Warning: Railcard not in filtered_df.")
-    fig2 = px.bar(
-        railcard_usage,
-        x='Railcard Type',
-        y='Number of Transactions',
-        title='Railcard Usage',
-        template='plotly_white'
-    )
-    fig2.update_layout(
-        xaxis_title='Railcard Type',
-        yaxis_title='Number of Transactions',
-        plot_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
+def update_journey_charts(month, station, ticket_type, railcard, payment, data_ready=None, dataset_name=None):
+    return update_section('journey', 4, [month, station, ticket_type, railcard, payment], dataset_name)
 
-    # Chart 3: Average Price by Ticket Type
-    if 'Ticket_Type' in filtered_df.columns and 'Price' in filtered_df.columns:
-        avg_price_by_ticket = filtered_df.groupby('Ticket_Type', observed=False)['Price'].mean().reset_index()
-    else:
-        avg_price_by_ticket = pd.DataFrame({'Ticket_Type': [], 'Price': []})
-        print("Warning: Ticket_Type or Price not in filtered_df.")
-    fig3 = px.bar(
-        avg_price_by_ticket,
-        x='Ticket_Type',
-        y='Price',
-        title='Average Price by Ticket Type',
-        template='plotly_white'
-    )
-    fig3.update_layout(
-        xaxis_title='Ticket Type',
-        yaxis_title='Average Price ($)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    # Chart 4: Number of Transactions by Purchase Type
-    if 'Purchase_Type' in filtered_df.columns:
-        purchase_type_counts = filtered_df['Purchase_Type'].value_counts().reset_index()
-        purchase_type_counts.columns = ['Purchase_Type', 'Count']
-    else:
-        purchase_type_counts = pd.DataFrame({'Purchase_Type': [], 'Count': []})
-        print("Warning: Purchase_Type not in filtered_df.")
-    fig4 = px.pie(
-        purchase_type_counts,
-        names='Purchase_Type',
-        values='Count',
-        title='Number of Transactions by Purchase Type',
-        template='plotly_white'
-    )
-    fig4.update_traces(textinfo='percent+label')
-    fig4.update_layout(
-        showlegend=True,
-        font=dict(size=12),
-        title_x=0.5,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-
-    return fig1, fig2, fig3, fig4
-
-# Update Performance Charts
 # Update Performance Charts
 @app.callback(
     [
         Output('chart-revenue-refunded', 'figure'),
         Output('chart-refunded-proportion', 'figure'),
         Output('chart-refunded-count', 'figure'),
-        Output('chart-payment-method', 'figure')
+        Output('chart-payment-method', 'figure'),
+        Output('data-ready-poll', 'disabled', allow_duplicate=True)
     ],
     [
         Input('filter-month', 'value'),
         Input('filter-station', 'value'),
         Input('filter-ticket-type', 'value'),
         Input('filter-railcard', 'value'),
-        Input('filter-payment', 'value')
-    ]
+        Input('filter-payment', 'value'),
+        Input('data-ready', 'data'),
+        Input('dataset-select', 'value')
+    ],
+    prevent_initial_call='initial_duplicate',
+    **background_options('performance')
 )
-def update_performance_charts(month, station, ticket_type, railcard, payment):
-    # Filter dataframe
-    filtered_df = df_fact.copy()
-    if month and 'Month' in filtered_df.columns and month != 'no-data':
-        filtered_df = filtered_df[filtered_df['Month'] == month]
-    if station and 'Departure_Station_Name' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Departure_Station_Name'] == station]
-    if ticket_type and 'Ticket_Type' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Ticket_Type'] == ticket_type]
-    if railcard and 'Railcard' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Railcard'] == railcard]
-    if payment and 'Payment_Method' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Payment_Method'] == payment]
-
-    # Handle empty dataframe
-    if filtered_df.empty:
-        empty_fig = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-        return empty_fig, empty_fig, empty_fig, empty_fig
-
-    # Chart 1: Revenue Impact of Refund Requests by Journey Status
-    if 'Journey_Status' in filtered_df.columns and 'Refund_Request' in filtered_df.columns and 'Price' in filtered_df.columns:
-        revenue_refunded = filtered_df.groupby(['Journey_Status', 'Refund_Request'], observed=False)['Price'].sum().reset_index()
-        if not revenue_refunded.empty:
-            fig1 = px.bar(
-                revenue_refunded,
-                x='Journey_Status',
-                y='Price',
-                color='Refund_Request',
-                barmode='group',
-                title='Revenue by Journey Status and Refund Request'
-            )
-            fig1.update_layout(
-                xaxis_title='Journey Status',
-                yaxis_title='Revenue ($)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-                font=dict(size=12),
-                title_x=0.5,
-                margin=dict(l=40, r=40, t=40, b=40),
-                legend_title_text='Refund Requested'
-            )
-        else:
-            fig1 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-    else:
-        fig1 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-
-    # Chart 2: Proportion of Refund Requests
-    if 'Refund_Request' in filtered_df.columns:
-        refund_proportion = filtered_df['Refund_Request'].value_counts().reset_index()
-        refund_proportion.columns = ['Refund_Request', 'Count']
-        if not refund_proportion.empty:
-            fig2 = px.pie(
-                refund_proportion,
-                names='Refund_Request',
-                values='Count',
-                title='Proportion of Refund Requests'
-            )
-            fig2.update_traces(textinfo='percent+label')
-            fig2.update_layout(
-                showlegend=True,
-                font=dict(size=12),
-                title_x=0.5,
-                margin=dict(l=40, r=40, t=70, b=10)
-            )
-        else:
-            fig2 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-    else:
-        fig2 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-
-    # Chart 3: Refund Requests by Journey Status
-    if 'Journey_Status' in filtered_df.columns and 'Refund_Request' in filtered_df.columns:
-        # Group by Journey_Status and Refund_Request to include both 'Yes' and 'No'
-        refund_count = filtered_df.groupby(['Journey_Status', 'Refund_Request'], observed=False).size().reset_index(name='Count')
-        if not refund_count.empty:
-            fig3 = px.bar(
-                refund_count,
-                x='Count',
-                y='Journey_Status',
-                color='Refund_Request',  # Differentiate 'Yes' and 'No' with colors
-                barmode='group',         # Display bars side by side
-                title='Refund Requests by Journey Status'
-            )
-            fig3.update_layout(
-                xaxis_title='Number of Transactions',
-                yaxis_title='Journey Status',
-                plot_bgcolor='rgba(0,0,0,0)',
-                yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-                font=dict(size=12),
-                title_x=0.5,
-                margin=dict(l=40, r=40, t=40, b=40),
-                legend_title_text='Refund Requested'  # Clarify legend
-            )
-        else:
-            fig3 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-    else:
-        fig3 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-
-    # Chart 4: Payment Method Distribution
-    if 'Payment_Method' in filtered_df.columns:
-        payment_method_dist = filtered_df['Payment_Method'].value_counts().reset_index()
-        payment_method_dist.columns = ['Payment_Method', 'Count']
-        if not payment_method_dist.empty:
-            fig4 = px.pie(
-                payment_method_dist,
-                names='Payment_Method',
-                values='Count',
-                title='Payment Method Distribution'
-            )
-            fig4.update_traces(textinfo='percent+label')
-            fig4.update_layout(
-                showlegend=True,
-                font=dict(size=12),
-                title_x=0.5,
-                margin=dict(l=40, r=40, t=40, b=40)
-            )
-        else:
-            fig4 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
-    else:
-        fig4 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+def update_performance_charts(month, station, ticket_type, railcard, payment, data_ready=None, dataset_name=None):
+    return update_section('performance', 4, [month, station, ticket_type, railcard, payment], dataset_name)
 
-    return fig1, fig2, fig3, fig4
+# Update KPI Cards: date-range totals are prefix-sum lookups on the purchase-date index
+@app.callback(
+    [Output('kpi-revenue', 'children'), Output('kpi-transactions', 'children'), Output('kpi-refund-rate', 'children'),
+     Output('data-ready-poll', 'disabled', allow_duplicate=True)],
+    [
+        Input('filter-month', 'value'),
+        Input('filter-station', 'value'),
+        Input('filter-ticket-type', 'value'),
+        Input('filter-railcard', 'value'),
+        Input('filter-payment', 'value'),
+        Input('kpi-period', 'start_date'),
+        Input('kpi-period', 'end_date'),
+        Input('data-ready', 'data'),
+        Input('dataset-select', 'value')
+    ],
+    prevent_initial_call='initial_duplicate'
+)
+def update_kpis(month, station, ticket_type, railcard, payment, start_date=None, end_date=None, data_ready=None, dataset_name=None):
+    dataset = registry.get(dataset_name)
+    index = dataset.time_indexes.get('purchase')
+    if index is None:
+        # Poll again while the dataset (re)loads
+        return "-", "-", "-", no_update if dataset.ready.is_set() else False
+    totals = index.totals([month, station, ticket_type, railcard, payment], start_date, end_date)
+    refund_rate = totals.get('refunds', 0) / totals['count'] if totals['count'] else 0
+    return f"${totals.get('revenue', 0):,.0f}", f"{totals['count']:,.0f}", f"{refund_rate:.1%}", no_update
 
 # Run App
 if __name__ == '__main__':
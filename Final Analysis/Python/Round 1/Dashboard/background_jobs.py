@@ -0,0 +1,160 @@
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import dash
+from dash.background_callback.managers import BaseBackgroundCallbackManager
+
+# Background callbacks on a fixed-size pool of job worker processes.
+#
+# dash.DiskcacheManager forks one new process per job, with no limit on how many
+# run at once, and each fork copies the threaded server in the middle of a
+# request (held locks, open SQLite connections included). JobPoolManager keeps
+# Dash's diskcache result/progress protocol but runs the jobs on a
+# ProcessPoolExecutor of `workers` processes:
+#  - workers are started from a clean forkserver, not forked from the server,
+#    and each imports the app module once (like a Celery worker), so it has the
+#    registered callbacks and loads the datasets it serves itself
+#  - jobs beyond the pool size wait in the executor queue
+#  - a job's state ('queued', 'running', 'done') is kept in the diskcache, so any
+#    server process can poll or cancel it. Cancelling a queued job drops it before
+#    it starts; a running job is left to finish (workers are not killed) and its
+#    result is discarded
+#  - results are stored per job: Dash's key only hashes the callback arguments, so
+#    two sessions with the same filters would otherwise collect each other's result
+#
+# Worker processes run with JOB_WORKER_ENV set and never start a pool of their own.
+
+JOB_WORKER_ENV = 'DASHBOARD_JOB_WORKER'
+WORKER_PRELOAD = ['numpy', 'pandas', 'plotly.graph_objects', 'dash']
+
+
+def is_job_worker():
+    return os.environ.get(JOB_WORKER_ENV) == '1'
+
+
+def job_manager():
+    # The JobPoolManager registered by the app module imported in this process
+    return next(m for m in BaseBackgroundCallbackManager.managers if isinstance(m, JobPoolManager))
+
+
+def start_worker(module, server_pid):
+    # Worker initializer: import the app (registers the callbacks, loads the default dataset)
+    # and exit when the server process is gone, as killing it does not stop the pool
+    def watch():
+        while True:
+            time.sleep(1)
+            try:
+                os.kill(server_pid, 0)
+            except ProcessLookupError:
+                os._exit(0)
+    threading.Thread(target=watch, name='server-watch', daemon=True).start()
+    main = sys.modules.get('__mp_main__')
+    if module not in sys.modules and os.path.splitext(os.path.basename(getattr(main, '__file__', '')))[0] == module:
+        # Server started as `python app.py`: multiprocessing already ran it here as __mp_main__
+        sys.modules[module] = main
+    importlib.import_module(module)
+
+
+def run_job(function_key, job, key, args, context):
+    manager = job_manager()
+    state_key, result_key = manager.state_key(job), manager.result_key(key, job)
+    with manager.handle.transact():
+        if manager.handle.get(state_key) != 'queued':
+            # Cancelled while waiting in the queue
+            return
+        manager.handle.set(state_key, 'running', expire=manager.state_ttl)
+    manager.func_registry[function_key](result_key, manager._make_progress_key(key), args, context)
+    with manager.handle.transact():
+        if manager.handle.get(state_key) == 'running':
+            manager.handle.set(state_key, 'done', expire=manager.state_ttl)
+        else:
+            # Cancelled while running: nobody will collect this result
+            manager.handle.delete(result_key)
+
+
+class JobPoolManager(dash.DiskcacheManager):
+
+    def __init__(self, cache, module, workers=2, state_ttl=3600):
+        super().__init__(cache)
+        self.module = module
+        self.workers = workers
+        self.state_ttl = state_ttl
+        self.executor = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def state_key(job):
+        return f'job-{job}-state'
+
+    @staticmethod
+    def result_key(key, job):
+        return f'{key}-job-{job}'
+
+    def start(self, broken=None):
+        # Start the worker processes (each imports the app module), or replace the pool `broken`.
+        # Returns the executor; None inside a job worker, which never runs a pool.
+        if is_job_worker():
+            return None
+        with self.lock:
+            if self.executor is not None and self.executor is not broken:
+                return self.executor
+            os.environ[JOB_WORKER_ENV] = '1'
+            try:
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(WORKER_PRELOAD)
+                self.executor = ProcessPoolExecutor(self.workers, mp_context=context,
+                                                    initializer=start_worker, initargs=(self.module, os.getpid()))
+                for _ in range(self.workers):
+                    # One call per worker so that all of them start (and load their data) now
+                    self.executor.submit(int)
+            finally:
+                del os.environ[JOB_WORKER_ENV]
+            return self.executor
+
+    def call_job_fn(self, key, job_fn, args, context):
+        function_key = next(k for k, fn in self.func_registry.items() if fn is job_fn)
+        job = uuid.uuid4().hex
+        self.handle.set(self.state_key(job), 'queued', expire=self.state_ttl)
+        call = (run_job, function_key, job, key, args, dict(context))
+        executor = self.start()
+        try:
+            future = executor.submit(*call)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OS): replace the pool and resubmit
+            future = self.start(broken=executor).submit(*call)
+        future.add_done_callback(lambda f: self._job_failed(f, key, job))
+        return job
+
+    def _job_failed(self, future, key, job):
+        # The job never reported back (its worker died): answer the poll with the error
+        # instead of leaving it 'queued' until the state expires
+        error = future.exception()
+        if error is None:
+            return
+        with self.handle.transact():
+            if self.handle.get(self.state_key(job)) is not None:
+                self.handle.set(self.result_key(key, job), {'background_callback_error': {
+                    'msg': repr(error), 'tb': ''.join(traceback.format_exception(error))}})
+                self.handle.set(self.state_key(job), 'done', expire=self.state_ttl)
+
+    def get_result(self, key, job):
+        return super().get_result(self.result_key(key, job), job)
+
+    def terminate_job(self, job):
+        # Cancel: a queued job is skipped, a running one finishes and its result is discarded
+        if job is not None:
+            self.handle.delete(self.state_key(job))
+
+    def terminate_unhealthy_job(self, job):
+        return False
+
+    def job_running(self, job):
+        return job is not None and self.handle.get(self.state_key(job)) is not None
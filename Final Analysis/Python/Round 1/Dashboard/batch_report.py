@@ -0,0 +1,116 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+# Batch version of the reports in MySQL/Round 1/UK_Train_Rides_Analysis.sql.
+# Instead of one GROUP BY scan per report, the joined star schema is grouped
+# once into a small cube (one row per combination of report dimensions) and
+# every report is rolled up from that cube.
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Dimensions used by at least one report
+CUBE_DIMENSIONS = [
+    'Purchase_Type', 'Payment_Method', 'Ticket_Class', 'Railcard', 'Ticket_Type',
+    'Journey_Status', 'Reason_for_Delay', 'Refund_Request', 'Journey_Month', 'Purchase_Month'
+]
+
+# Report name -> (group by columns, HAVING COUNT(*) > n or None, row limit); mirrors the SQL file
+COUNT_REPORTS = {
+    'purchase_type': (['Purchase_Type'], 1, None),
+    'payment_method': (['Payment_Method'], 1, None),
+    'ticket_class': (['Ticket_Class'], 1, None),
+    'railcard': (['Railcard'], 1, None),
+    'ticket_class_railcard': (['Ticket_Class', 'Railcard'], 1, None),
+    'ticket_type': (['Ticket_Type'], 1, None),
+    'status_delay_reason': (['Journey_Status', 'Reason_for_Delay'], 1, None),
+    'status_refund': (['Journey_Status', 'Refund_Request'], 1, 3),
+    'monthly_journeys': (['Journey_Month'], None, None),
+    'monthly_purchases': (['Purchase_Month'], None, None),
+}
+
+
+def clean_price(price):
+    # Vectorized equivalent of CAST(REPLACE(REPLACE(Price, '£', ''), ',', '') AS DECIMAL)
+    if pd.api.types.is_numeric_dtype(price):
+        return price
+    return pd.to_numeric(price.astype(str).str.replace(r'[£,\s]', '', regex=True), errors='coerce')
+
+
+def load_report_data(data_dir=DATA_DIR):
+    # Read only the columns the reports need from the star schema tables
+    df_fact = pd.read_csv(
+        os.path.join(data_dir, 'fact_transactions.csv'),
+        usecols=['Purchase_Type', 'Payment_Method', 'Railcard', 'Ticket_Class', 'Ticket_Type',
+                 'Price', 'Journey_Status', 'Time_ID', 'Journey_ID', 'Refund_Request']
+    )
+    df_journey = pd.read_csv(os.path.join(data_dir, 'dim_journey.csv'),
+                             usecols=['Journey_ID', 'Journey_Date', 'Reason_for_Delay'])
+    df_time = pd.read_csv(os.path.join(data_dir, 'dim_time.csv'), usecols=['Time_ID', 'Purchase_Date'])
+
+    # Map dimension attributes onto the fact rows by key instead of full merges
+    journey = df_journey.set_index('Journey_ID')
+    time_dim = df_time.set_index('Time_ID')
+    df = df_fact.drop(columns=['Time_ID', 'Journey_ID'])
+    df['Journey_Month'] = pd.to_datetime(df_fact['Journey_ID'].map(journey['Journey_Date']), errors='coerce').dt.month
+    df['Purchase_Month'] = pd.to_datetime(df_fact['Time_ID'].map(time_dim['Purchase_Date']), errors='coerce').dt.month
+    df['Reason_for_Delay'] = df_fact['Journey_ID'].map(journey['Reason_for_Delay'])
+
+    # Same cleaning steps as the SQL script
+    df['Price'] = clean_price(df['Price'])
+    df['Railcard'] = df['Railcard'].fillna('No Card')
+    on_time = df['Journey_Status'].eq('On Time') & df['Reason_for_Delay'].isna()
+    df.loc[on_time, 'Reason_for_Delay'] = 'No Delay'
+    return df
+
+
+def build_cube(df):
+    # The only pass over the transaction rows
+    return df.groupby(CUBE_DIMENSIONS, dropna=False, observed=True).agg(
+        number_=('Price', 'size'),
+        price_sum=('Price', 'sum'),
+        price_count=('Price', 'count')
+    ).reset_index()
+
+
+def build_reports(cube):
+    reports = {}
+    for name, (columns, having, limit) in COUNT_REPORTS.items():
+        report = cube.groupby(columns, dropna=False, observed=True)['number_'].sum().reset_index()
+        if having is not None:
+            report = report[report['number_'] > having]
+        report = report.sort_values('number_', ascending=False)
+        if limit:
+            report = report.head(limit)
+        reports[name] = report.reset_index(drop=True)
+
+    total_price = cube['price_sum'].sum()
+    total_count = cube['price_count'].sum()
+    reports['average_price'] = pd.DataFrame({'avg_price': [total_price / total_count if total_count else None]})
+    return reports
+
+
+def write_reports(reports, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for name, report in reports.items():
+        report.to_csv(os.path.join(output_dir, f'{name}.csv'), index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute all UK train rides SQL reports in one pass.')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Folder with the star schema CSV files')
+    parser.add_argument('--output-dir', default=os.path.join(DATA_DIR, 'reports'), help='Folder for the report CSV files')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = load_report_data(args.data_dir)
+    cube = build_cube(df)
+    reports = build_reports(cube)
+    write_reports(reports, args.output_dir)
+
+    print(f"Scanned {len(df)} transactions into a {len(cube)}-row cube in {time.perf_counter() - start:.2f}s")
+    for name, report in reports.items():
+        print(f"\n{name}:")
+        print(report.to_string(index=False))
@@ -0,0 +1,379 @@
+import calendar
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Loading of the star schema behind the dashboard.
+# pandas and the aggregation helpers are imported inside the functions, so
+# importing this module (and app.py) stays cheap; the heavy work happens in
+# Dataset.load(), which app.py runs either at startup or in a background thread.
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+OPTIONS_FILE = 'dropdown_options.json'
+
+# Dimension columns used by the dashboard; derivable keys (time_key, journey_key) are not loaded
+DIMENSION_COLUMNS = {
+    'dim_journey.csv': ['Journey_ID', 'Journey_Date', 'Delay_Period', 'Reason_for_Delay'],
+    'dim_time.csv': ['Time_ID', 'Month', 'Year', 'Purchase_Date', 'Hour_of_Day']
+}
+
+# Dropdown id -> (column in df_fact, sort values)
+DROPDOWN_COLUMNS = {
+    'filter-month': ('Month', True),
+    'filter-station': ('Departure_Station_Name', True),
+    'filter-ticket-type': ('Ticket_Type', False),
+    'filter-railcard': ('Railcard', False),
+    'filter-payment': ('Payment_Method', False)
+}
+
+
+def read_fact_table(data_dir=DATA_DIR):
+    # Prefer the month partitions written by partitions.py over the single CSV
+    import pandas as pd
+    from partitions import MANIFEST_FILE, PARTITIONS_DIR, read_partitions
+
+    root = os.path.join(data_dir, PARTITIONS_DIR)
+    if os.path.exists(os.path.join(root, MANIFEST_FILE)):
+        return read_partitions(root)
+    return pd.read_csv(os.path.join(data_dir, 'fact_transactions.csv'))
+
+
+def dataset_version(data_dir=DATA_DIR):
+    # Hash of the names, sizes and contents of the data files (including every month
+    # partition). It changes whenever the data does, but not with the checkout path or
+    # file timestamps, so a fresh clone or deploy of the same data has the same version.
+    from partitions import MANIFEST_FILE, PARTITIONS_DIR, read_manifest
+
+    files = ['fact_transactions.csv', 'dim_journey.csv', 'dim_location.csv', 'dim_time.csv',
+             f'{PARTITIONS_DIR}/{MANIFEST_FILE}']
+    manifest = read_manifest(os.path.join(data_dir, PARTITIONS_DIR))
+    files += [f'{PARTITIONS_DIR}/{part}' for _, partition in sorted(manifest['partitions'].items())
+              for part in partition['paths']]
+    digest = hashlib.sha1()
+    for name in files:
+        path = os.path.join(data_dir, *name.split('/'))
+        if os.path.exists(path):
+            digest.update(f'{name}:{os.path.getsize(path)}:'.encode('utf-8'))
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(2**20), b''):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_star_schema(data_dir=DATA_DIR, timings=None, compact_ids=True):
+    # Read the four tables and join them into one transaction-level frame.
+    # compact_ids=False keeps string IDs and every dimension column (for memory comparisons).
+    import pandas as pd
+    from identifiers import compact_transaction_ids, narrow_ids
+
+    if timings is None:
+        timings = {}
+    start = time.perf_counter()
+
+    # Load Datasets with Error Handling
+    try:
+        df_fact = read_fact_table(data_dir)
+        usecols = {name: (lambda c, wanted=wanted: c.strip() in wanted) if compact_ids else None
+                   for name, wanted in DIMENSION_COLUMNS.items()}
+        df_journey = pd.read_csv(os.path.join(data_dir, 'dim_journey.csv'), usecols=usecols['dim_journey.csv'])
+        df_location = pd.read_csv(os.path.join(data_dir, 'dim_location.csv'))
+        df_time = pd.read_csv(os.path.join(data_dir, 'dim_time.csv'), usecols=usecols['dim_time.csv'])
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        df_fact = pd.DataFrame()
+        df_journey = pd.DataFrame()
+        df_location = pd.DataFrame()
+        df_time = pd.DataFrame()
+    timings['read_csv'] = time.perf_counter() - start
+    start = time.perf_counter()
+
+    # Strip whitespace from column names
+    df_fact.columns = df_fact.columns.str.strip()
+    df_journey.columns = df_journey.columns.str.strip()
+    df_location.columns = df_location.columns.str.strip()
+    df_time.columns = df_time.columns.str.strip()
+
+    # Print columns and Time_ID types for debugging
+    print("fact_transactions columns:", df_fact.columns.tolist())
+    print("dim_journey columns:", df_journey.columns.tolist())
+    print("dim_location columns:", df_location.columns.tolist())
+    print("dim_time columns:", df_time.columns.tolist())
+    if 'Time_ID' in df_fact.columns:
+        print("fact_transactions Time_ID dtype:", df_fact['Time_ID'].dtype)
+    if 'Time_ID' in df_time.columns:
+        print("dim_time Time_ID dtype:", df_time['Time_ID'].dtype)
+    if 'Railcard' in df_fact.columns:
+        print("Unique Railcard values:", df_fact['Railcard'].unique().tolist())
+
+    # Check if df_fact is empty
+    if df_fact.empty:
+        print("Warning: df_fact is empty. Check if CSV files exist and are correctly formatted.")
+
+    # Optimize memory for categorical columns
+    categorical_columns = ['Purchase_Type', 'Payment_Method', 'Railcard', 'Ticket_Class', 'Ticket_Type', 'Journey_Status', 'Refund_Request']
+    for col in categorical_columns:
+        if col in df_fact.columns:
+            try:
+                df_fact[col] = df_fact[col].astype('category')
+            except Exception as e:
+                print(f"Warning: Could not convert {col} to category: {e}")
+    if 'Station_Name' in df_location.columns:
+        df_location['Station_Name'] = df_location['Station_Name'].astype('category')
+
+    # Preprocess data
+    if not df_fact.empty:
+        if compact_ids:
+            # Integer IDs and join keys as narrow unsigned integers
+            for df in (df_fact, df_journey, df_location, df_time):
+                narrow_ids(df)
+        else:
+            # Ensure Transaction_ID and Time_ID are strings
+            if 'Transaction_ID' in df_fact.columns:
+                df_fact['Transaction_ID'] = df_fact['Transaction_ID'].astype(str)
+            if 'Time_ID' in df_fact.columns:
+                df_fact['Time_ID'] = df_fact['Time_ID'].astype(str)
+            if 'Time_ID' in df_time.columns:
+                df_time['Time_ID'] = df_time['Time_ID'].astype(str)
+        if 'Time_ID' in df_fact.columns:
+            print("fact_transactions Time_ID dtype after conversion:", df_fact['Time_ID'].dtype)
+    
+        # Merge with dim_time to get Purchase_Date and Hour_of_Day
+        if not df_time.empty and 'Time_ID' in df_fact.columns and 'Time_ID' in df_time.columns:
+            print("dim_time Time_ID dtype after conversion:", df_time['Time_ID'].dtype)
+            df_fact = df_fact.merge(
+                df_time[['Time_ID', 'Month', 'Year', 'Purchase_Date', 'Hour_of_Day']],
+                on='Time_ID',
+                how='left'
+            )
+            print("After dim_time merge, df_fact shape:", df_fact.shape)
+            print("Sample Purchase_Date:", df_fact['Purchase_Date'].head().tolist())
+            print("Sample Hour_of_Day:", df_fact['Hour_of_Day'].head().tolist())
+        else:
+            print("Warning: dim_time merge skipped; Time_ID not found or df_time is empty.")
+    
+        # Merge with dim_journey
+        if not df_journey.empty and 'Journey_ID' in df_fact.columns:
+            df_fact = df_fact.merge(
+                df_journey[['Journey_ID', 'Journey_Date', 'Delay_Period', 'Reason_for_Delay']],
+                on='Journey_ID',
+                how='left'
+            )
+            print("After dim_journey merge, df_fact shape:", df_fact.shape)
+            print("df_fact columns after dim_journey merge:", df_fact.columns.tolist())
+    
+        # Merge with dim_location for Departure and Arrival stations
+        if not df_location.empty and 'Departure_Station_ID' in df_fact.columns:
+            df_fact = df_fact.merge(
+                df_location[['Station_ID', 'Station_Name']],
+                left_on='Departure_Station_ID',
+                right_on='Station_ID',
+                how='left'
+            ).rename(columns={'Station_Name': 'Departure_Station_Name'}).drop(columns=['Station_ID'], errors='ignore')
+            print("After departure dim_location merge, df_fact shape:", df_fact.shape)
+    
+        if not df_location.empty and 'Arrival_Station_ID' in df_fact.columns:
+            df_fact = df_fact.merge(
+                df_location[['Station_ID', 'Station_Name']],
+                left_on='Arrival_Station_ID',
+                right_on='Station_ID',
+                how='left'
+            ).rename(columns={'Station_Name': 'Arrival_Station_Name'}).drop(columns=['Station_ID'], errors='ignore')
+            print("After arrival dim_location merge, df_fact shape:", df_fact.shape)
+            print("df_fact columns after all merges:", df_fact.columns.tolist())
+
+        # Ensure Purchase_Date and Journey_Date are datetime
+        if 'Purchase_Date' in df_fact.columns:
+            invalid_dates = df_fact['Purchase_Date'][df_fact['Purchase_Date'].isna()]
+            if not invalid_dates.empty:
+                print("Warning: Invalid Purchase_Date values found:", invalid_dates.head().tolist())
+            df_fact['Purchase_Date'] = pd.to_datetime(df_fact['Purchase_Date'], errors='coerce')
+            df_fact['Month'] = df_fact['Purchase_Date'].dt.month
+            print("Sample Purchase_Date after datetime conversion:", df_fact['Purchase_Date'].head().tolist())
+    
+        if 'Journey_Date' in df_fact.columns:
+            invalid_journey_dates = df_fact['Journey_Date'][df_fact['Journey_Date'].isna()]
+            if not invalid_journey_dates.empty:
+                print("Warning: Invalid Journey_Date values found:", invalid_journey_dates.head().tolist())
+            df_fact['Journey_Date'] = pd.to_datetime(df_fact['Journey_Date'], errors='coerce')
+            print("Sample Journey_Date after datetime conversion:", df_fact['Journey_Date'].head().tolist())
+
+        # Transaction IDs as fixed-width integers instead of one string per row
+        if compact_ids:
+            df_fact = compact_transaction_ids(df_fact)
+    timings['join_and_preprocess'] = time.perf_counter() - start
+    return df_fact
+
+
+def memory_report(df):
+    # Deep memory use of every column and the per-row footprint of the frame
+    usage = df.memory_usage(deep=True, index=False)
+    total = int(usage.sum())
+    return {
+        'rows': len(df),
+        'bytes': total,
+        'bytes_per_row': round(total / len(df), 1) if len(df) else 0.0,
+        'columns': {column: int(size) for column, size in usage.items()}
+    }
+
+
+def print_memory_comparison(before, after):
+    columns = list(dict.fromkeys(list(before['columns']) + list(after['columns'])))
+    print(f"{'column':<26}{'before B/row':>14}{'after B/row':>14}")
+    for column in columns:
+        sizes = [report['columns'].get(column) for report in (before, after)]
+        cells = [f"{size / report['rows']:.1f}" if size is not None else '-' for size, report in zip(sizes, (before, after))]
+        print(f"{column:<26}{cells[0]:>14}{cells[1]:>14}")
+    print(f"{'total':<26}{before['bytes_per_row']:>14}{after['bytes_per_row']:>14}")
+
+
+def compute_dropdown_options(df_fact):
+    import pandas as pd
+
+    options = {}
+    for dropdown_id, (column, sort_values) in DROPDOWN_COLUMNS.items():
+        if column not in df_fact.columns:
+            options[dropdown_id] = [{'label': 'No Data', 'value': 'no-data'}] if dropdown_id == 'filter-month' else []
+            continue
+        values = [v for v in df_fact[column].unique() if pd.notna(v)]
+        if sort_values:
+            values = sorted(values)
+        if dropdown_id == 'filter-month':
+            options[dropdown_id] = [{'label': calendar.month_name[int(m)], 'value': int(m)} for m in values]
+        else:
+            options[dropdown_id] = [{'label': str(v), 'value': str(v)} for v in values]
+    return options
+
+
+def read_dropdown_options(data_dir=DATA_DIR):
+    # (option lists, dataset_version() they were computed from) stored next to the
+    # CSV files, or (None, None); files without a version are treated as stale, and
+    # unreadable ones as missing (the options are then computed from the data)
+    path = os.path.join(data_dir, OPTIONS_FILE)
+    if not os.path.exists(path):
+        return None, None
+    try:
+        with open(path) as f:
+            stored = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read {path}: {e}")
+        return None, None
+    if 'options' not in stored:
+        return stored, None
+    return stored['options'], stored.get('version')
+
+
+def write_dropdown_options(options, data_dir=DATA_DIR, version=None):
+    # Write to a temporary file first so readers (other workers starting up) never see
+    # a half-written file; the name is per process so concurrent writers do not collide
+    path = os.path.join(data_dir, OPTIONS_FILE)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump({'version': version, 'options': options}, f, indent=2)
+    os.replace(temporary, path)
+
+
+class Dataset:
+    # One star schema (fact table joined with its dimensions) plus everything
+    # derived from it: the partition zone maps, the daily prefix-sum indexes and
+    # the dropdown option lists
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.df_fact = None
+        self.zone_maps = None
+        self.time_indexes = {}
+        self.memory = None
+        self.options = None
+        self.options_version = None
+        self.version = None
+        self.error = None
+        self.timings = {}
+        self.ready = threading.Event()
+
+    def load_options(self):
+        start = time.perf_counter()
+        self.options, self.options_version = read_dropdown_options(self.data_dir)
+        self.timings['read_options'] = time.perf_counter() - start
+        return self.options
+
+    def load(self):
+        load_start = time.perf_counter()
+        try:
+            start = time.perf_counter()
+            import pandas  # noqa: F401
+            from aggregations import build_zone_maps, zone_maps_nbytes
+            from time_index import PrefixSumIndex
+            self.timings['import_data_modules'] = time.perf_counter() - start
+
+            if self.options is None:
+                self.load_options()
+            self.version = dataset_version(self.data_dir)
+            df_fact = load_star_schema(self.data_dir, self.timings)
+
+            # Keep rows grouped by purchase year/month so filters can skip whole months
+            start = time.perf_counter()
+            if 'Year' in df_fact.columns and 'Month' in df_fact.columns:
+                df_fact = df_fact.sort_values(['Year', 'Month'], kind='stable', ignore_index=True)
+            zone_maps = build_zone_maps(df_fact)
+            self.timings['zone_maps'] = time.perf_counter() - start
+
+            # Per-day running totals by purchase date and by journey date
+            start = time.perf_counter()
+            time_indexes = {name: PrefixSumIndex(df_fact, column)
+                            for name, column in [('purchase', 'Purchase_Date'), ('journey', 'Journey_Date')]
+                            if column in df_fact.columns}
+            self.timings['time_indexes'] = time.perf_counter() - start
+
+            # Stored options only stand in until the data is loaded; they are recomputed
+            # whenever the data files changed since they were written (e.g. an appended month)
+            if self.options is None or self.options_version != self.version:
+                start = time.perf_counter()
+                self.options, self.options_version = compute_dropdown_options(df_fact), self.version
+                self.timings['compute_options'] = time.perf_counter() - start
+                try:
+                    write_dropdown_options(self.options, self.data_dir, self.version)
+                except OSError as e:
+                    print(f"Warning: Could not store dropdown options: {e}")
+
+            self.zone_maps = zone_maps
+            self.time_indexes = time_indexes
+            self.memory = memory_report(df_fact)
+            self.memory['time_indexes'] = {name: index.nbytes for name, index in time_indexes.items()}
+            self.memory['zone_maps'] = zone_maps_nbytes(zone_maps)
+            print(f"df_fact memory: {self.memory['bytes'] / 2**20:.1f} MB ({self.memory['bytes_per_row']} bytes/row), "
+                  f"time indexes: {sum(self.memory['time_indexes'].values()) / 2**20:.2f} MB, "
+                  f"zone maps: {self.memory['zone_maps'] / 2**20:.2f} MB")
+            self.df_fact = df_fact
+            self.timings['total_load'] = time.perf_counter() - load_start
+            print("Dataset load time breakdown (s):", {k: round(v, 3) for k, v in self.timings.items()})
+        except Exception as e:
+            print(f"Error: Could not load dataset from {self.data_dir}: {e}")
+            self.error = str(e)
+        finally:
+            self.ready.set()
+        return self
+
+    def load_in_background(self):
+        thread = threading.Thread(target=self.load, name='dataset-loader', daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Precompute the dropdown options of the dashboard data.')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='Compare the per-row memory of df_fact with string IDs (before) and compact IDs (after)')
+    args = parser.parse_args()
+
+    if args.memory_report:
+        before = memory_report(load_star_schema(compact_ids=False))
+        after = memory_report(load_star_schema())
+        print_memory_comparison(before, after)
+    else:
+        # Precompute the dropdown option lists and store them with the data
+        write_dropdown_options(compute_dropdown_options(load_star_schema()), version=dataset_version())
+        print(f"Wrote {os.path.join(DATA_DIR, OPTIONS_FILE)}")
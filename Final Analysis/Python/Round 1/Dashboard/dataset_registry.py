@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+
+from data_loader import DATA_DIR, Dataset
+
+# Several star schemas (one per operator or region) served from one process.
+#
+# datasets.json lists the datasets; data_dir is relative to the config file:
+#   {"default": "uk-rail",
+#    "datasets": {"uk-rail": {"label": "UK Train Rides", "data_dir": ".", "memory_mb": 256}}}
+#
+#  - a dataset is loaded in the background the first time a session selects it
+#  - memory_mb is the dataset's budget: it is reserved while the dataset loads,
+#    then the measured footprint (df_fact plus its time indexes and zone maps)
+#    is charged, with a warning if over budget. Datasets without memory_mb get
+#    an even share of the server budget (memory_budget / number of datasets), so
+#    tenants without an explicit budget do not each claim the whole server and
+#    evict one another
+#  - when a load would exceed the server's total budget, the least recently used
+#    datasets are evicted first; datasets idle for `idle_seconds` are evicted too
+
+CONFIG_FILE = os.path.join(DATA_DIR, 'datasets.json')
+DEFAULT_NAME = 'default'
+
+
+def read_config(path=CONFIG_FILE):
+    # Without a config file the registry serves the CSV files next to app.py
+    if not os.path.exists(path):
+        return {'default': DEFAULT_NAME, 'datasets': {DEFAULT_NAME: {'label': 'UK Train Rides', 'data_dir': DATA_DIR}}}
+    with open(path) as f:
+        config = json.load(f)
+    root = os.path.dirname(os.path.abspath(path))
+    for entry in config['datasets'].values():
+        entry['data_dir'] = os.path.normpath(os.path.join(root, entry.get('data_dir', '.')))
+    return config
+
+
+def footprint(dataset):
+    # Measured bytes of a loaded dataset: df_fact, its time indexes and the zone maps
+    if not dataset.memory:
+        return 0
+    return (dataset.memory['bytes'] + sum(dataset.memory.get('time_indexes', {}).values())
+            + dataset.memory.get('zone_maps', 0))
+
+
+class DatasetRegistry:
+
+    def __init__(self, config, memory_budget=2 * 2**30, idle_seconds=1800):
+        self.memory_budget = memory_budget
+        self.idle_seconds = idle_seconds
+        self.default = config.get('default') or next(iter(config['datasets']))
+        self.entries = {}
+        share = memory_budget // max(len(config['datasets']), 1)
+        for name, entry in config['datasets'].items():
+            self.entries[name] = {
+                'label': entry.get('label', name),
+                'data_dir': entry['data_dir'],
+                'budget': int(entry['memory_mb'] * 2**20) if 'memory_mb' in entry else share,
+                'dataset': None,
+                'last_used': 0.0
+            }
+        self.lock = threading.Lock()
+
+    def options(self):
+        return [{'label': entry['label'], 'value': name} for name, entry in self.entries.items()]
+
+    def resolve(self, name):
+        return name if name in self.entries else self.default
+
+    def _charge(self, entry):
+        # Measured footprint once loaded, the reserved budget while loading
+        dataset = entry['dataset']
+        if dataset is None:
+            return 0
+        if dataset.ready.is_set():
+            return footprint(dataset)
+        return entry['budget']
+
+    def _evict(self, name, reason):
+        entry = self.entries[name]
+        print(f"Evicting dataset '{name}' ({reason})")
+        entry['dataset'] = None
+
+    def _make_room(self, keep, needed):
+        # Evict loaded datasets, least recently used first, until `needed` more bytes fit
+        used = sum(self._charge(entry) for entry in self.entries.values())
+        candidates = sorted((entry['last_used'], name) for name, entry in self.entries.items()
+                            if name != keep and entry['dataset'] is not None and entry['dataset'].ready.is_set())
+        for _, name in candidates:
+            if used + needed <= self.memory_budget:
+                break
+            used -= self._charge(self.entries[name])
+            self._evict(name, 'memory budget')
+        if used + needed > self.memory_budget:
+            print(f"Warning: loading dataset '{keep}' goes over the server memory budget")
+
+    def evict_idle(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            for name, entry in self.entries.items():
+                dataset = entry['dataset']
+                if dataset is not None and dataset.ready.is_set() and now - entry['last_used'] > self.idle_seconds:
+                    self._evict(name, f"idle for {now - entry['last_used']:.0f}s")
+
+    def get(self, name=None, wait=False):
+        # The Dataset for `name`, starting a background load if it is not in memory.
+        # Callers check dataset.ready / dataset.df_fact before using it.
+        name = self.resolve(name)
+        with self.lock:
+            entry = self.entries[name]
+            entry['last_used'] = time.time()
+            dataset = entry['dataset']
+            if dataset is None:
+                self._make_room(name, entry['budget'])
+                dataset = Dataset(entry['data_dir'])
+                dataset.load_options()
+                entry['dataset'] = dataset
+                if wait:
+                    dataset.load()
+                else:
+                    thread = dataset.load_in_background()
+                    threading.Thread(target=self._check_budget, args=(name, dataset, thread), daemon=True).start()
+        if wait:
+            dataset.ready.wait()
+            self._check_budget(name, dataset)
+        return dataset
+
+    def _check_budget(self, name, dataset, thread=None):
+        if thread is not None:
+            thread.join()
+        budget = self.entries[name]['budget']
+        if footprint(dataset) > budget:
+            print(f"Warning: dataset '{name}' uses {footprint(dataset) / 2**20:.0f} MB, "
+                  f"over its {budget / 2**20:.0f} MB budget")
+
+    def start_reaper(self, interval=60):
+        # Periodically evict idle datasets
+        def reap():
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+        thread = threading.Thread(target=reap, name='dataset-reaper', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        with self.lock:
+            now = time.time()
+            return {name: {
+                'label': entry['label'],
+                'loaded': entry['dataset'] is not None and entry['dataset'].df_fact is not None,
+                'loading': entry['dataset'] is not None and not entry['dataset'].ready.is_set(),
+                'memory_bytes': self._charge(entry),
+                'budget_bytes': entry['budget'],
+                'idle_seconds': round(now - entry['last_used']) if entry['last_used'] else None
+            } for name, entry in self.entries.items()}
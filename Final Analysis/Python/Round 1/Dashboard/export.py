@@ -0,0 +1,108 @@
+import importlib.util
+import io
+import zlib
+
+from aggregations import filter_mask, prune_zones, selected_filters
+from identifiers import restore_transaction_ids
+
+# Streaming export of the filtered transaction rows.
+# df_fact is walked in fixed-size row chunks; each chunk is filtered, encoded and
+# (for CSV) compressed before the next one is touched, so only one chunk of the
+# result is ever held in memory. Compact Transaction_ID columns are turned back
+# into text per chunk.
+
+EXPORT_CHUNK_ROWS = 50000
+
+EXPORT_FORMATS = {
+    # format -> (mimetype, file extension)
+    'csv': ('text/csv', 'csv'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+# format -> optional module it needs
+EXPORT_DEPENDENCIES = {
+    'parquet': 'pyarrow'
+}
+
+
+def missing_dependency(export_format):
+    # Name of the uninstalled module a format needs, else None. Checked before the
+    # response starts: once the stream has begun the status can no longer change.
+    module = EXPORT_DEPENDENCIES.get(export_format)
+    return module if module and importlib.util.find_spec(module) is None else None
+
+
+def iter_filtered_chunks(df, filters, chunk_rows=EXPORT_CHUNK_ROWS, zone_maps=None):
+    # Only the row ranges of partitions that can match are walked
+    selected = selected_filters(*filters)
+    ranges = prune_zones(zone_maps, selected) if zone_maps is not None and selected else [(0, len(df))]
+    for range_start, range_stop in ranges:
+        for start in range(range_start, range_stop, chunk_rows):
+            chunk = df.iloc[start:min(start + chunk_rows, range_stop)]
+            mask = filter_mask(chunk, *filters)
+            rows = chunk if mask is None else chunk[mask]
+            if not rows.empty:
+                yield restore_transaction_ids(rows)
+
+
+def iter_csv(df, filters, compress=False, chunk_rows=EXPORT_CHUNK_ROWS, zone_maps=None):
+    # wbits=31 writes a gzip container, so the stream is a valid .csv.gz file
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    header = True
+    for rows in iter_filtered_chunks(df, filters, chunk_rows, zone_maps):
+        data = rows.to_csv(index=False, header=header, date_format='%Y-%m-%d').encode('utf-8')
+        header = False
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if header:
+        # No matching rows: still send the column names
+        data = restore_transaction_ids(df.head(0)).to_csv(index=False).encode('utf-8')
+        yield compressor.compress(data) if compressor else data
+    if compressor:
+        yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file object that hands the written bytes back to the generator
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.extend(data)
+        return len(data)
+
+    def take(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def iter_parquet(df, filters, compression='zstd', chunk_rows=EXPORT_CHUNK_ROWS, zone_maps=None):
+    # One Parquet row group per chunk, compressed by the Parquet writer itself
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).")
+    sink = _ChunkSink()
+    schema = pa.Schema.from_pandas(restore_transaction_ids(df.head(0)), preserve_index=False)
+    with pq.ParquetWriter(sink, schema, compression=compression) as writer:
+        for rows in iter_filtered_chunks(df, filters, chunk_rows, zone_maps):
+            writer.write_table(pa.Table.from_pandas(rows, schema=schema, preserve_index=False))
+            data = sink.take()
+            if data:
+                yield data
+    yield sink.take()
+
+
+def iter_export(df, filters, export_format='csv', zone_maps=None):
+    if export_format == 'parquet':
+        return iter_parquet(df, filters, zone_maps=zone_maps)
+    return iter_csv(df, filters, compress=(export_format == 'csv.gz'), zone_maps=zone_maps)
@@ -0,0 +1,503 @@
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+from aggregations import aggregate_section
+from payloads import compact_figure, loads
+
+# Figure builders for the dashboard sections. app.py imports this module on the
+# first chart request, so pandas and plotly.express are not loaded at startup.
+
+# Aggregations needed by each section; computed in one grouped pass per callback
+OVERVIEW_AGGREGATIONS = {
+    'transactions_hour': {'by': ['Hour_of_Day'], 'agg': 'count', 'name': 'Number of Transactions'},
+    'ticket_type_revenue': {'by': ['Ticket_Type'], 'agg': 'sum', 'name': 'Price'},
+    'daily_transactions': {'by': ['Purchase_Date'], 'agg': 'count', 'name': 'Number of Transactions'},
+    'journey_status_dist': {'by': ['Journey_Status'], 'agg': 'count', 'name': 'Count', 'sort': True}
+}
+REVENUE_AGGREGATIONS = {
+    'daily_revenue': {'by': ['Journey_Date'], 'agg': 'sum', 'name': 'Daily Revenue'},
+    'ticket_class_revenue': {'by': ['Ticket_Class'], 'agg': 'sum', 'name': 'Price'},
+    'station_revenue': {'by': ['Departure_Station_Name'], 'agg': 'sum', 'name': 'Price', 'sort': True, 'top': 5}
+}
+JOURNEY_AGGREGATIONS = {
+    'delay_reasons': {'by': ['Reason_for_Delay'], 'agg': 'count', 'name': 'Count', 'sort': True,
+                      'exclude': {'Reason_for_Delay': ['No Delay']}},
+    'railcard_usage': {'by': ['Railcard'], 'agg': 'count', 'name': 'Number of Transactions', 'sort': True},
+    'avg_price_by_ticket': {'by': ['Ticket_Type'], 'agg': 'mean', 'name': 'Price'},
+    'purchase_type_counts': {'by': ['Purchase_Type'], 'agg': 'count', 'name': 'Count', 'sort': True}
+}
+PERFORMANCE_AGGREGATIONS = {
+    'revenue_refunded': {'by': ['Journey_Status', 'Refund_Request'], 'agg': 'sum', 'name': 'Price'},
+    'refund_proportion': {'by': ['Refund_Request'], 'agg': 'count', 'name': 'Count', 'sort': True},
+    'refund_count': {'by': ['Journey_Status', 'Refund_Request'], 'agg': 'count', 'name': 'Count'},
+    'payment_method_dist': {'by': ['Payment_Method'], 'agg': 'count', 'name': 'Count', 'sort': True}
+}
+SECTION_AGGREGATIONS = {
+    'overview': OVERVIEW_AGGREGATIONS,
+    'revenue': REVENUE_AGGREGATIONS,
+    'journey': JOURNEY_AGGREGATIONS,
+    'performance': PERFORMANCE_AGGREGATIONS
+}
+
+# Daily charts read from the prefix-sum time indexes (time_index.py):
+# section -> chart name -> (index, measure)
+TIME_INDEX_CHARTS = {
+    'overview': {'daily_transactions': ('purchase', 'count')},
+    'revenue': {'daily_revenue': ('journey', 'revenue')}
+}
+
+def indexed_aggregates(section, time_indexes, filters):
+    # Daily series of the section from the time indexes instead of a group-by on the rows
+    charts = SECTION_AGGREGATIONS[section]
+    return {name: time_indexes[index].daily(filters, measure, charts[name]['name'])
+            for name, (index, measure) in TIME_INDEX_CHARTS.get(section, {}).items() if index in time_indexes}
+
+def section_aggregates(filtered_df, charts, precomputed=None):
+    # Charts already answered (e.g. from a time index) are left out of the grouped pass
+    precomputed = precomputed or {}
+    aggregates = aggregate_section(filtered_df, {name: spec for name, spec in charts.items() if name not in precomputed})
+    aggregates.update(precomputed)
+    return aggregates
+
+# Build Overview Charts from the (filtered) rows
+def build_overview_figures(filtered_df, precomputed=None):
+
+    # Debug: Print filtered dataframe info
+    print(f"Filtered dataframe shape: {filtered_df.shape}")
+    print(f"Filtered dataframe columns: {filtered_df.columns.tolist()}")
+    if not filtered_df.empty:
+        if 'Purchase_Date' in filtered_df.columns:
+            print(f"Sample Purchase_Date: {filtered_df['Purchase_Date'].head().tolist()}")
+        if 'Hour_of_Day' in filtered_df.columns:
+            print(f"Sample Hour_of_Day: {filtered_df['Hour_of_Day'].head().tolist()}")
+
+    # Handle empty dataframe
+    if filtered_df.empty:
+        empty_fig = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+        return empty_fig, empty_fig, empty_fig, empty_fig
+
+    aggregates = section_aggregates(filtered_df, OVERVIEW_AGGREGATIONS, precomputed)
+
+    # Chart 1: Transactions by Hour of Day
+    transactions_hour = aggregates['transactions_hour']
+    if transactions_hour is None:
+        transactions_hour = pd.DataFrame({'Hour_of_Day': range(24), 'Number of Transactions': [0]*24})
+        print("Warning: Hour_of_Day not in filtered_df; using fallback data.")
+    fig1 = px.line(
+        transactions_hour,
+        x='Hour_of_Day',
+        y='Number of Transactions',
+        title='Number of Transactions by Hour of Day',
+        markers=True,
+        line_shape='linear',
+        template='plotly_white'
+    )
+    fig1.update_layout(
+        xaxis_title='Hour of Day',
+        yaxis_title='Number of Transactions',
+        showlegend=False,
+        xaxis=dict(tickmode='linear', tick0=0, dtick=1),
+        plot_bgcolor='rgba(0,0,0,0)',
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    # Chart 2: Revenue by Ticket Type
+    ticket_type_revenue = aggregates['ticket_type_revenue']
+    if ticket_type_revenue is None:
+        ticket_type_revenue = pd.DataFrame({'Ticket_Type': [], 'Price': []})
+        print("Warning: Ticket_Type or Price not in filtered_df.")
+    fig2 = px.bar(
+        ticket_type_revenue,
+        x='Ticket_Type',
+        y='Price',
+        title='Revenue by Ticket Type',
+        template='plotly_white'
+    )
+    fig2.update_layout(
+        xaxis_title='Ticket Type',
+        yaxis_title='Revenue ($)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    # Chart 3: Daily Number of Transactions
+    daily_transactions = aggregates['daily_transactions']
+    if daily_transactions is None:
+        daily_transactions = pd.DataFrame({'Purchase_Date': [], 'Number of Transactions': []})
+        print("Warning: Purchase_Date not in filtered_df; using fallback data.")
+    fig3 = px.line(
+        daily_transactions,
+        x='Purchase_Date',
+        y='Number of Transactions',
+        title='Daily Number of Transactions',
+        template='plotly_white'
+    )
+    fig3.update_layout(
+        xaxis_title='Date',
+        yaxis_title='Number of Transactions',
+        xaxis_tickformat='%b %d',
+        plot_bgcolor='rgba(0,0,0,0)',
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    # Chart 4: Journey Status Distribution
+    journey_status_dist = aggregates['journey_status_dist']
+    if journey_status_dist is None:
+        journey_status_dist = pd.DataFrame({'Journey_Status': [], 'Count': []})
+        print("Warning: Journey_Status not in filtered_df.")
+    fig4 = px.pie(
+        journey_status_dist,
+        names='Journey_Status',
+        values='Count',
+        title='Journey Status Distribution',
+        hole=0.5,
+        template='plotly_white'
+    )
+    fig4.update_traces(textinfo='percent+label', pull=[0.05]*len(journey_status_dist))
+    fig4.update_layout(
+        showlegend=True,
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=10, r=10, t=80, b=10)
+    )
+
+    return fig1, fig2, fig3, fig4
+
+
+# Build Revenue Charts from the (filtered) rows
+def build_revenue_figures(filtered_df, precomputed=None):
+
+    # Debug: Print filtered dataframe info
+    print(f"Revenue charts - Filtered dataframe shape: {filtered_df.shape}")
+    print(f"Revenue charts - Filtered dataframe columns: {filtered_df.columns.tolist()}")
+    if not filtered_df.empty:
+        if 'Journey_Date' in filtered_df.columns:
+            print(f"Revenue charts - Sample Journey_Date: {filtered_df['Journey_Date'].head().tolist()}")
+        if 'Ticket_Class' in filtered_df.columns:
+            print(f"Revenue charts - Sample Ticket_Class: {filtered_df['Ticket_Class'].head().tolist()}")
+        if 'Departure_Station_Name' in filtered_df.columns:
+            print(f"Revenue charts - Sample Departure_Station_Name: {filtered_df['Departure_Station_Name'].head().tolist()}")
+
+    # Handle empty dataframe
+    if filtered_df.empty:
+        empty_fig = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+        return empty_fig, empty_fig, empty_fig
+
+    aggregates = section_aggregates(filtered_df, REVENUE_AGGREGATIONS, precomputed)
+
+    # Chart 1: Daily Revenue
+    daily_revenue = aggregates['daily_revenue']
+    if daily_revenue is None:
+        daily_revenue = pd.DataFrame({'Journey_Date': [], 'Daily Revenue': []})
+        print("Warning: Journey_Date or Price not in filtered_df; using fallback data.")
+    fig1 = px.line(
+        daily_revenue,
+        x='Journey_Date',
+        y='Daily Revenue',
+        title='Daily Revenue',
+        template='plotly_white'
+    )
+    fig1.update_layout(
+        xaxis_title='Date',
+        yaxis_title='Revenue ($)',
+        xaxis_tickformat='%b %d',
+        plot_bgcolor='rgba(0,0,0,0)',
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40),
+        showlegend=False
+    )
+
+    # Chart 2: Revenue Distribution by Ticket Class
+    ticket_class_revenue = aggregates['ticket_class_revenue']
+    if ticket_class_revenue is None:
+        ticket_class_revenue = pd.DataFrame({'Ticket_Class': [], 'Price': []})
+        print("Warning: Ticket_Class or Price not in filtered_df.")
+    fig2 = px.pie(
+        ticket_class_revenue,
+        names='Ticket_Class',
+        values='Price',
+        title='Revenue Distribution by Ticket Class',
+        template='plotly_white'
+    )
+    fig2.update_traces(textinfo='percent+label')
+    fig2.update_layout(
+        showlegend=True,
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    # Chart 3: Revenue by Departure Station (Top 5)
+    station_revenue = aggregates['station_revenue']
+    if station_revenue is None:
+        station_revenue = pd.DataFrame({'Departure_Station_Name': [], 'Price': []})
+        print("Warning: Departure_Station_Name or Price not in filtered_df.")
+    fig3 = px.bar(
+        station_revenue,
+        x='Price',
+        y='Departure_Station_Name',
+        title='Revenue by Departure Station',
+        template='plotly_white'
+    )
+    fig3.update_layout(
+        xaxis_title='Revenue',
+        yaxis_title='Station',
+        plot_bgcolor='rgba(0,0,0,0)',
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    return fig1, fig2, fig3
+
+
+# Build Journey Charts from the (filtered) rows
+def build_journey_figures(filtered_df, precomputed=None):
+
+    # Debug: Print filtered dataframe info
+    print(f"Journey charts - Filtered dataframe shape: {filtered_df.shape}")
+    print(f"Journey charts - Filtered dataframe columns: {filtered_df.columns.tolist()}")
+    if not filtered_df.empty:
+        if 'Reason_for_Delay' in filtered_df.columns:
+            print(f"Journey charts - Sample Reason_for_Delay: {filtered_df['Reason_for_Delay'].head().tolist()}")
+        if 'Railcard' in filtered_df.columns:
+            print(f"Journey charts - Sample Railcard: {filtered_df['Railcard'].head().tolist()}")
+        if 'Ticket_Type' in filtered_df.columns:
+            print(f"Journey charts - Sample Ticket_Type: {filtered_df['Ticket_Type'].head().tolist()}")
+        if 'Purchase_Type' in filtered_df.columns:
+            print(f"Journey charts - Sample Purchase_Type: {filtered_df['Purchase_Type'].head().tolist()}")
+
+    # Handle empty dataframe
+    if filtered_df.empty:
+        empty_fig = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+        return empty_fig, empty_fig, empty_fig, empty_fig
+
+    aggregates = section_aggregates(filtered_df, JOURNEY_AGGREGATIONS, precomputed)
+
+    # Chart 1: Delay Reasons (excluding 'No Delay')
+    delay_reasons = aggregates['delay_reasons']
+    if delay_reasons is not None:
+        delay_reasons = delay_reasons.rename(columns={'Reason_for_Delay': 'Reason'})
+    else:
+        delay_reasons = pd.DataFrame({'Reason': [], 'Count': []})
+        print("Warning: Reason_for_Delay not in filtered_df.")
+    fig1 = px.bar(
+        delay_reasons,
+        x='Count',
+        y='Reason',
+        title='Delay Reasons',
+        template='plotly_white'
+    )
+    fig1.update_layout(
+        xaxis_title='Count',
+        yaxis_title='Reason',
+        plot_bgcolor='rgba(0,0,0,0)',
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    # Chart 2: Railcard Usage
+    railcard_usage = aggregates['railcard_usage']
+    if railcard_usage is not None:
+        railcard_usage = railcard_usage.rename(columns={'Railcard': 'Railcard Type'})
+    else:
+        railcard_usage = pd.DataFrame({'Railcard Type': [], 'Number of Transactions': []})
+        print("Warning: Railcard not in filtered_df.")
+    fig2 = px.bar(
+        railcard_usage,
+        x='Railcard Type',
+        y='Number of Transactions',
+        title='Railcard Usage',
+        template='plotly_white'
+    )
+    fig2.update_layout(
+        xaxis_title='Railcard Type',
+        yaxis_title='Number of Transactions',
+        plot_bgcolor='rgba(0,0,0,0)',
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    # Chart 3: Average Price by Ticket Type
+    avg_price_by_ticket = aggregates['avg_price_by_ticket']
+    if avg_price_by_ticket is None:
+        avg_price_by_ticket = pd.DataFrame({'Ticket_Type': [], 'Price': []})
+        print("Warning: Ticket_Type or Price not in filtered_df.")
+    fig3 = px.bar(
+        avg_price_by_ticket,
+        x='Ticket_Type',
+        y='Price',
+        title='Average Price by Ticket Type',
+        template='plotly_white'
+    )
+    fig3.update_layout(
+        xaxis_title='Ticket Type',
+        yaxis_title='Average Price ($)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    # Chart 4: Number of Transactions by Purchase Type
+    purchase_type_counts = aggregates['purchase_type_counts']
+    if purchase_type_counts is None:
+        purchase_type_counts = pd.DataFrame({'Purchase_Type': [], 'Count': []})
+        print("Warning: Purchase_Type not in filtered_df.")
+    fig4 = px.pie(
+        purchase_type_counts,
+        names='Purchase_Type',
+        values='Count',
+        title='Number of Transactions by Purchase Type',
+        template='plotly_white'
+    )
+    fig4.update_traces(textinfo='percent+label')
+    fig4.update_layout(
+        showlegend=True,
+        font=dict(size=12),
+        title_x=0.5,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    return fig1, fig2, fig3, fig4
+
+
+# Build Performance Charts from the (filtered) rows
+def build_performance_figures(filtered_df, precomputed=None):
+
+    # Handle empty dataframe
+    if filtered_df.empty:
+        empty_fig = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+        return empty_fig, empty_fig, empty_fig, empty_fig
+
+    aggregates = section_aggregates(filtered_df, PERFORMANCE_AGGREGATIONS, precomputed)
+
+    # Chart 1: Revenue Impact of Refund Requests by Journey Status
+    revenue_refunded = aggregates['revenue_refunded']
+    if revenue_refunded is not None:
+        if not revenue_refunded.empty:
+            fig1 = px.bar(
+                revenue_refunded,
+                x='Journey_Status',
+                y='Price',
+                color='Refund_Request',
+                barmode='group',
+                title='Revenue by Journey Status and Refund Request'
+            )
+            fig1.update_layout(
+                xaxis_title='Journey Status',
+                yaxis_title='Revenue ($)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+                font=dict(size=12),
+                title_x=0.5,
+                margin=dict(l=40, r=40, t=40, b=40),
+                legend_title_text='Refund Requested'
+            )
+        else:
+            fig1 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+    else:
+        fig1 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+
+    # Chart 2: Proportion of Refund Requests
+    refund_proportion = aggregates['refund_proportion']
+    if refund_proportion is not None:
+        if not refund_proportion.empty:
+            fig2 = px.pie(
+                refund_proportion,
+                names='Refund_Request',
+                values='Count',
+                title='Proportion of Refund Requests'
+            )
+            fig2.update_traces(textinfo='percent+label')
+            fig2.update_layout(
+                showlegend=True,
+                font=dict(size=12),
+                title_x=0.5,
+                margin=dict(l=40, r=40, t=70, b=10)
+            )
+        else:
+            fig2 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+    else:
+        fig2 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+
+    # Chart 3: Refund Requests by Journey Status
+    refund_count = aggregates['refund_count']
+    if refund_count is not None:
+        # Grouped by Journey_Status and Refund_Request to include both 'Yes' and 'No'
+        if not refund_count.empty:
+            fig3 = px.bar(
+                refund_count,
+                x='Count',
+                y='Journey_Status',
+                color='Refund_Request',  # Differentiate 'Yes' and 'No' with colors
+                barmode='group',         # Display bars side by side
+                title='Refund Requests by Journey Status'
+            )
+            fig3.update_layout(
+                xaxis_title='Number of Transactions',
+                yaxis_title='Journey Status',
+                plot_bgcolor='rgba(0,0,0,0)',
+                yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+                font=dict(size=12),
+                title_x=0.5,
+                margin=dict(l=40, r=40, t=40, b=40),
+                legend_title_text='Refund Requested'  # Clarify legend
+            )
+        else:
+            fig3 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+    else:
+        fig3 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+
+    # Chart 4: Payment Method Distribution
+    payment_method_dist = aggregates['payment_method_dist']
+    if payment_method_dist is not None:
+        if not payment_method_dist.empty:
+            fig4 = px.pie(
+                payment_method_dist,
+                names='Payment_Method',
+                values='Count',
+                title='Payment Method Distribution'
+            )
+            fig4.update_traces(textinfo='percent+label')
+            fig4.update_layout(
+                showlegend=True,
+                font=dict(size=12),
+                title_x=0.5,
+                margin=dict(l=40, r=40, t=40, b=40)
+            )
+        else:
+            fig4 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+    else:
+        fig4 = px.scatter(x=[0], y=[0], title="No Data Available").update_traces(visible=False)
+
+    return fig1, fig2, fig3, fig4
+
+def figures_to_json(figures):
+    # JSON array of the section's figures, as stored in the shared result cache and sent
+    # to the browser: numeric arrays as base64 typed arrays, unused template parts dropped
+    return pio.json.to_json_plotly([compact_figure(loads(fig.to_json())) for fig in figures])
+
+SECTION_BUILDERS = {
+    'overview': build_overview_figures,
+    'revenue': build_revenue_figures,
+    'journey': build_journey_figures,
+    'performance': build_performance_figures
+}
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# Compact storage for identifier columns.
+# Transaction_ID values are UUID fragments such as 'da8a6ba8-b3dc-4677-b176'
+# (8-4-4-4 hex digits, 80 bits). Instead of one string per row they are kept
+# as two unsigned integer columns:
+#   Transaction_ID_hi - the leading hex digits beyond the last 16 (uint16 here)
+#   Transaction_ID_lo - the last 16 hex digits (uint64)
+# and only formatted back to text where rows leave the app (exports).
+# Integer IDs and join keys are narrowed to the smallest integer type.
+
+TRANSACTION_ID = 'Transaction_ID'
+TRANSACTION_ID_GROUPS = (8, 4, 4, 4)
+ID_COLUMNS = ['Time_ID', 'Journey_ID', 'Departure_Station_ID', 'Arrival_Station_ID', 'Station_ID']
+
+HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+NIBBLES = np.full(256, 255, dtype=np.uint8)
+NIBBLES[np.frombuffer(b'0123456789abcdef', dtype=np.uint8)] = np.arange(16)
+
+
+def hi_dtype(digits):
+    # Smallest unsigned type for the digits that do not fit in the 64-bit low part
+    extra = max(digits - 16, 0)
+    return np.uint8 if extra <= 2 else np.uint16 if extra <= 4 else np.uint32 if extra <= 8 else np.uint64
+
+
+def encode_hex_ids(values, groups=TRANSACTION_ID_GROUPS):
+    # (hi, lo) integer arrays for dash-separated hex IDs, or None if any value has another layout
+    digits, length = sum(groups), sum(groups) + len(groups) - 1
+    if digits > 32 or not pd.api.types.is_string_dtype(values) or values.isna().any() or not (values.str.len() == length).all():
+        return None
+    chars = np.asarray(values.to_numpy(dtype=object), dtype=f'S{length}').view(np.uint8).reshape(len(values), length)
+    dashes = np.cumsum(groups[:-1]) + np.arange(len(groups) - 1)
+    if not (chars[:, dashes] == ord('-')).all():
+        return None
+    nibbles = NIBBLES[np.delete(chars, dashes, axis=1)]
+    if (nibbles == 255).any():
+        return None
+
+    hi = np.zeros(len(values), dtype=np.uint64)
+    lo = np.zeros(len(values), dtype=np.uint64)
+    split = max(digits - 16, 0)
+    for column in range(digits):
+        if column < split:
+            hi = (hi << np.uint64(4)) | nibbles[:, column].astype(np.uint64)
+        else:
+            lo = (lo << np.uint64(4)) | nibbles[:, column].astype(np.uint64)
+    return hi.astype(hi_dtype(digits)), lo
+
+
+def format_hex_ids(hi, lo, groups=TRANSACTION_ID_GROUPS):
+    # Inverse of encode_hex_ids(): array of 'xxxxxxxx-xxxx-...' strings
+    digits = sum(groups)
+    hi, lo = np.asarray(hi, dtype=np.uint64), np.asarray(lo, dtype=np.uint64)
+    chars = np.empty((len(lo), digits), dtype=np.uint8)
+    for shift in range(digits):
+        source, offset = (lo, shift) if shift < 16 else (hi, shift - 16)
+        chars[:, digits - 1 - shift] = HEX_DIGITS[(source >> np.uint64(4 * offset)) & np.uint64(15)]
+
+    parts, position = [], 0
+    dash = np.full((len(lo), 1), ord('-'), dtype=np.uint8)
+    for group in groups:
+        parts.extend([chars[:, position:position + group], dash])
+        position += group
+    text = np.ascontiguousarray(np.hstack(parts[:-1]))
+    return text.view(f'S{digits + len(groups) - 1}').ravel().astype(str)
+
+
+def compact_transaction_ids(df, column=TRANSACTION_ID):
+    # Replace the string ID column with its _hi/_lo integer columns (in place of the original)
+    if column not in df.columns:
+        return df
+    encoded = encode_hex_ids(df[column])
+    if encoded is None:
+        print(f"Warning: {column} values are not all {'-'.join('x' * g for g in TRANSACTION_ID_GROUPS)} hex IDs; kept as strings.")
+        return df
+    position = df.columns.get_loc(column)
+    df = df.drop(columns=[column])
+    df.insert(position, f'{column}_lo', encoded[1])
+    df.insert(position, f'{column}_hi', encoded[0])
+    return df
+
+
+def restore_transaction_ids(df, column=TRANSACTION_ID):
+    # Text IDs for output; frames that still have the string column are returned unchanged
+    hi, lo = f'{column}_hi', f'{column}_lo'
+    if hi not in df.columns or lo not in df.columns:
+        return df
+    position = df.columns.get_loc(hi)
+    restored = df.drop(columns=[hi, lo])
+    restored.insert(position, column, format_hex_ids(df[hi].to_numpy(), df[lo].to_numpy()))
+    return restored
+
+
+def narrow_ids(df, columns=ID_COLUMNS):
+    # Downcast integer ID columns without missing values to the smallest unsigned type
+    for column in columns:
+        if column in df.columns and pd.api.types.is_integer_dtype(df[column]) and (df[column] >= 0).all():
+            df[column] = pd.to_numeric(df[column], downcast='unsigned')
+    return df
@@ -0,0 +1,309 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+# Load-testing harness for the dashboard callbacks.
+# Simulates N analysts against a running server (python app.py, gunicorn, ...)
+# by posting to the same /_dash-update-component endpoint the browser uses.
+# Filter values are taken from the real dropdown options in the served layout.
+#
+# Example:
+#   python load_test.py --users 20 --duration 60 --label dev-server --server-pid 12345
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_test_results')
+# Seconds to wait for any one HTTP response; a call that takes longer is recorded as an error
+REQUEST_TIMEOUT = 30
+
+
+def get_json(url, timeout=REQUEST_TIMEOUT):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def find_dropdown_options(component, options=None):
+    # Walk the layout tree and collect the options of every filter dropdown
+    if options is None:
+        options = {}
+    if isinstance(component, list):
+        for child in component:
+            find_dropdown_options(child, options)
+    elif isinstance(component, dict):
+        props = component.get('props', {})
+        component_id = props.get('id')
+        if isinstance(component_id, str) and component_id.startswith('filter-') and 'options' in props:
+            options[component_id] = [o['value'] if isinstance(o, dict) else o for o in props['options'] or []]
+        find_dropdown_options(props.get('children'), options)
+    return options
+
+
+def parse_outputs(output):
+    # "..a.figure...b.figure.." for multi-output callbacks, "a.figure" otherwise
+    if output.startswith('..'):
+        parts = output[2:-2].split('...')
+        return [{'id': p.rsplit('.', 1)[0], 'property': p.rsplit('.', 1)[1]} for p in parts]
+    component_id, prop = output.rsplit('.', 1)
+    return {'id': component_id, 'property': prop}
+
+
+def discover_callbacks(base_url):
+    # Split the app's callbacks into filter-driven chart callbacks and nav callbacks
+    dependencies = get_json(f'{base_url}/_dash-dependencies')
+    filter_callbacks, nav_callbacks = [], []
+    for dependency in dependencies:
+        input_ids = [i['id'] for i in dependency['inputs'] if isinstance(i['id'], str)]
+        if not input_ids or len(input_ids) != len(dependency['inputs']):
+            continue
+        if any(i.startswith('filter-') for i in input_ids):
+            filter_callbacks.append(dependency)
+        elif all(i.startswith('nav-') for i in input_ids):
+            nav_callbacks.append(dependency)
+    return filter_callbacks, nav_callbacks
+
+
+def build_payload(dependency, values, changed):
+    return {
+        'output': dependency['output'],
+        'outputs': parse_outputs(dependency['output']),
+        'inputs': [{'id': i['id'], 'property': i['property'], 'value': values.get(i['id'])} for i in dependency['inputs']],
+        'changedPropIds': changed,
+        'state': [{'id': s['id'], 'property': s['property'], 'value': values.get(s['id'])} for s in dependency['state']]
+    }
+
+
+def post_callback(base_url, payload, poll_interval=0.1, timeout=REQUEST_TIMEOUT, deadline=None):
+    # Background callbacks first answer with a job handle; poll it like the browser does
+    # until the result arrives, giving up (TimeoutError) once `deadline` (perf_counter time) passes.
+    # Returns (latency, bytes received over all requests).
+    start = time.perf_counter()
+    query = ''
+    received = 0
+    while True:
+        request = urllib.request.Request(
+            f'{base_url}/_dash-update-component{query}',
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            encoding = response.headers.get('Content-Encoding')
+        received += len(body)
+        if not body:
+            break
+        data = json.loads(gzip.decompress(body) if encoding == 'gzip' else body)
+        if 'response' in data or (not query and 'job' not in data):
+            break
+        if not query:
+            query = '?' + urlencode({'cacheKey': data['cacheKey'], 'job': data['job']})
+        if deadline is None:
+            time.sleep(poll_interval)
+        elif time.perf_counter() < deadline:
+            time.sleep(max(min(poll_interval, deadline - time.perf_counter()), 0))
+        else:
+            raise TimeoutError('background job still running at the end of the test')
+    return time.perf_counter() - start, received
+
+
+class WorkerSampler(threading.Thread):
+    # Samples CPU and memory of the server process(es) while the test runs
+
+    def __init__(self, pids, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.processes = []
+        for pid in pids:
+            process = psutil.Process(pid)
+            self.processes.append(process)
+            self.processes.extend(process.children(recursive=True))
+        self.samples = {p.pid: [] for p in self.processes}
+
+    def run(self):
+        for process in self.processes:
+            process.cpu_percent(None)
+        while not self.stop_event.wait(self.interval):
+            for process in self.processes:
+                try:
+                    self.samples[process.pid].append((process.cpu_percent(None), process.memory_info().rss))
+                except psutil.Error:
+                    pass
+
+    def summary(self):
+        workers = {}
+        for pid, samples in self.samples.items():
+            if not samples:
+                continue
+            cpu = [s[0] for s in samples]
+            rss = [s[1] for s in samples]
+            workers[str(pid)] = {
+                'cpu_percent_mean': round(sum(cpu) / len(cpu), 1),
+                'cpu_percent_max': round(max(cpu), 1),
+                'rss_mb_mean': round(sum(rss) / len(rss) / 2**20, 1),
+                'rss_mb_max': round(max(rss) / 2**20, 1)
+            }
+        return workers
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def latency_summary(latencies):
+    return {
+        'count': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        'max_ms': round(max(latencies) * 1000, 1) if latencies else None
+    }
+
+
+def simulate_user(base_url, options, filter_callbacks, nav_callbacks, deadline, think_time, nav_probability, seed, results, lock,
+                  timeout=REQUEST_TIMEOUT):
+    rng = random.Random(seed)
+    values = {filter_id: None for filter_id in options}
+    while time.perf_counter() < deadline:
+        if nav_callbacks and rng.random() < nav_probability:
+            # Nav click: the browser sends the clicked link's n_clicks
+            dependency = rng.choice(nav_callbacks)
+            clicked = rng.choice(dependency['inputs'])['id']
+            calls = [(dependency, {clicked: rng.randint(1, 10)}, [f'{clicked}.n_clicks'])]
+        else:
+            # Filter change: pick a random value (or clear) for one dropdown, then
+            # every chart callback fires with the full filter state
+            filter_id = rng.choice(list(options))
+            choices = options[filter_id]
+            values[filter_id] = rng.choice(choices + [None]) if choices else None
+            calls = [(dependency, values, [f'{filter_id}.value']) for dependency in filter_callbacks]
+
+        interaction_start = time.perf_counter()
+        # No new calls once the test is over; an interaction cut short is not counted
+        while calls and time.perf_counter() < deadline:
+            dependency, call_values, changed = calls.pop(0)
+            try:
+                latency, size = post_callback(base_url, build_payload(dependency, call_values, changed),
+                                              timeout=timeout, deadline=deadline)
+                error, timed_out = None, False
+            except Exception as e:
+                # urlopen reports a timeout as TimeoutError, or as a URLError wrapping one
+                timed_out = isinstance(e, TimeoutError) or isinstance(getattr(e, 'reason', None), TimeoutError)
+                latency, size, error = None, 0, str(e)
+            with lock:
+                results['requests'].append({'output': dependency['output'], 'latency': latency, 'bytes': size,
+                                            'error': error, 'timed_out': timed_out})
+        if calls:
+            break
+        with lock:
+            results['interactions'].append(time.perf_counter() - interaction_start)
+
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+
+
+def run_load_test(base_url, users, duration, think_time=0.0, nav_probability=0.2, server_pids=None, seed=0,
+                  timeout=REQUEST_TIMEOUT):
+    layout = get_json(f'{base_url}/_dash-layout')
+    options = find_dropdown_options(layout)
+    filter_callbacks, nav_callbacks = discover_callbacks(base_url)
+    print(f"Found {len(filter_callbacks)} chart callbacks, {len(nav_callbacks)} nav callbacks, filters: {list(options)}")
+
+    sampler = None
+    if server_pids:
+        if psutil is None:
+            print("Warning: psutil is not installed; worker CPU and memory will not be recorded.")
+        else:
+            sampler = WorkerSampler(server_pids)
+            sampler.start()
+
+    results = {'requests': [], 'interactions': []}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + duration
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        for user in range(users):
+            pool.submit(simulate_user, base_url, options, filter_callbacks, nav_callbacks,
+                        deadline, think_time, nav_probability, seed + user, results, lock, timeout)
+    elapsed = time.perf_counter() - start
+
+    if sampler:
+        sampler.stop_event.set()
+        sampler.join()
+
+    ok = [r for r in results['requests'] if r['error'] is None]
+    per_callback = {}
+    for request in ok:
+        per_callback.setdefault(request['output'], []).append(request['latency'])
+
+    return {
+        'url': base_url,
+        'users': users,
+        'duration_s': round(elapsed, 2),
+        'think_time_s': think_time,
+        'requests': len(results['requests']),
+        'errors': len(results['requests']) - len(ok),
+        'timeouts': sum(r['timed_out'] for r in results['requests']),
+        'throughput_rps': round(len(ok) / elapsed, 2),
+        'interactions_per_s': round(len(results['interactions']) / elapsed, 2),
+        'mean_response_kb': round(sum(r['bytes'] for r in ok) / len(ok) / 1024, 1) if ok else None,
+        'latency': latency_summary([r['latency'] for r in ok]),
+        'interaction_latency': latency_summary(results['interactions']),
+        'callbacks': {output: latency_summary(latencies) for output, latencies in per_callback.items()},
+        'workers': sampler.summary() if sampler else {}
+    }
+
+
+def print_comparison(paths):
+    rows = []
+    for path in paths:
+        with open(path) as f:
+            result = json.load(f)
+        rows.append((result.get('label', os.path.basename(path)), result))
+    print(f"{'label':<24}{'users':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for label, r in rows:
+        latency = r['latency']
+        print(f"{label:<24}{r['users']:>6}{r['throughput_rps']:>9}{latency['p50_ms']!s:>9}"
+              f"{latency['p95_ms']!s:>9}{latency['p99_ms']!s:>9}{r['errors']:>8}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent-user load test for the UK Train Rides dashboard.')
+    parser.add_argument('--url', default='http://127.0.0.1:8050', help='Base URL of the running dashboard')
+    parser.add_argument('--users', type=int, default=10, help='Number of simulated concurrent users')
+    parser.add_argument('--duration', type=float, default=30, help='Test duration in seconds')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Max random pause between interactions (s)')
+    parser.add_argument('--nav-probability', type=float, default=0.2, help='Share of interactions that are nav clicks')
+    parser.add_argument('--server-pid', type=int, action='append', help='Server PID to sample (children included)')
+    parser.add_argument('--label', default='default', help='Name of the serving configuration under test')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT,
+                        help='Seconds to wait for one response before recording the call as an error')
+    parser.add_argument('--compare', nargs='+', metavar='RESULT', help='Print a comparison of saved result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(args.compare)
+    else:
+        result = run_load_test(args.url.rstrip('/'), args.users, args.duration, args.think_time,
+                               args.nav_probability, args.server_pid, args.seed, args.timeout)
+        result['label'] = args.label
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{args.label}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(json.dumps({k: v for k, v in result.items() if k != 'callbacks'}, indent=2))
+        print(f"Results saved to {path}")
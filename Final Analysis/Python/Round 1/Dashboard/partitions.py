@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+# Month-partitioned storage for the fact table.
+#
+#   fact_partitions/
+#       _manifest.json
+#       year=2024/month=01/part-0.csv
+#       year=2024/month=01/part-1.csv   (rows appended later)
+#       ...
+#
+# Rows are partitioned by purchase year/month (via Time_ID -> dim_time). The
+# manifest keeps per-partition part files, row counts, min/max of the numeric
+# columns and value counts of the categorical columns, so readers can skip
+# partitions that cannot match a filter without opening them. Appending rows
+# writes one new part file per month they fall in (a new partition, or the next
+# part-N.csv of an existing one with its stats merged) and rewrites only the
+# manifest; existing part files are never rewritten unless replace is asked for.
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+PARTITIONS_DIR = 'fact_partitions'
+MANIFEST_FILE = '_manifest.json'
+
+RANGE_COLUMNS = ['Price', 'Time_ID', 'Journey_ID', 'Departure_Station_ID', 'Arrival_Station_ID']
+CATEGORY_COLUMNS = ['Purchase_Type', 'Payment_Method', 'Railcard', 'Ticket_Class', 'Ticket_Type',
+                    'Journey_Status', 'Refund_Request', 'Departure_Station_ID', 'Arrival_Station_ID']
+
+
+def partition_key(year, month):
+    return f'year={int(year)}/month={int(month):02d}'
+
+
+def read_manifest(root):
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'partitions': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(root, manifest):
+    # Write to a temporary file first so readers never see a half-written manifest
+    path = os.path.join(root, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def partition_stats(rows, purchase_dates):
+    stats = {'rows': int(len(rows)), 'ranges': {}, 'categories': {}}
+    for column in RANGE_COLUMNS:
+        if column in rows.columns and rows[column].notna().any():
+            stats['ranges'][column] = [rows[column].min().item(), rows[column].max().item()]
+    for column in CATEGORY_COLUMNS:
+        if column in rows.columns:
+            counts = rows[column].fillna('None').astype(str).value_counts()
+            stats['categories'][column] = {str(k): int(v) for k, v in counts.items()}
+    if purchase_dates.notna().any():
+        stats['purchase_date'] = [str(purchase_dates.min().date()), str(purchase_dates.max().date())]
+    return stats
+
+
+def merge_stats(old, new):
+    # Stats of a partition after adding a part file with stats `new`
+    merged = {'rows': old['rows'] + new['rows'], 'ranges': dict(old['ranges']), 'categories': {}}
+    for column, (low, high) in new['ranges'].items():
+        if column in merged['ranges']:
+            merged['ranges'][column] = [min(low, merged['ranges'][column][0]), max(high, merged['ranges'][column][1])]
+        else:
+            merged['ranges'][column] = [low, high]
+    for column in set(old['categories']) | set(new['categories']):
+        counts = dict(old['categories'].get(column, {}))
+        for value, count in new['categories'].get(column, {}).items():
+            counts[value] = counts.get(value, 0) + count
+        merged['categories'][column] = counts
+    dates = [d for stats in (old, new) if 'purchase_date' in stats for d in stats['purchase_date']]
+    if dates:
+        merged['purchase_date'] = [min(dates), max(dates)]
+    return merged
+
+
+def partition_paths(partition):
+    # Part files of a partition (manifests written before appends kept a single 'path')
+    return partition['paths'] if 'paths' in partition else [partition['path']]
+
+
+def purchase_dates_for(df_fact, df_time):
+    dates = pd.to_datetime(df_time.set_index('Time_ID')['Purchase_Date'], errors='coerce')
+    return df_fact['Time_ID'].map(dates)
+
+
+def write_partition(root, rows, purchase_dates, year, month, manifest, replace=True):
+    # Write `rows` as the partition's next part file, or as its only one when replacing
+    key = partition_key(year, month)
+    existing = manifest['partitions'].get(key)
+    paths = partition_paths(existing) if existing and not replace else []
+    directory = os.path.join(root, key)
+    os.makedirs(directory, exist_ok=True)
+    name = f'part-{len(paths)}.csv'
+    path = os.path.join(directory, name)
+    rows.to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+
+    stats = partition_stats(rows, purchase_dates)
+    if paths:
+        stats = merge_stats(existing, stats)
+    elif existing:
+        # Replaced: drop the part files the new one does not overwrite
+        for stale in partition_paths(existing):
+            if stale != f'{key}/{name}' and os.path.exists(os.path.join(root, stale)):
+                os.remove(os.path.join(root, stale))
+    manifest['partitions'][key] = {'year': int(year), 'month': int(month), 'paths': paths + [f'{key}/{name}'], **stats}
+
+
+def write_partitions(df_fact, df_time, root):
+    # Split the whole fact table into year/month partitions
+    os.makedirs(root, exist_ok=True)
+    dates = purchase_dates_for(df_fact, df_time)
+    manifest = {'partitions': {}}
+    for (year, month), index in dates.groupby([dates.dt.year, dates.dt.month]).groups.items():
+        write_partition(root, df_fact.loc[index], dates.loc[index], year, month, manifest)
+    unpartitioned = dates.isna().sum()
+    if unpartitioned:
+        print(f"Warning: {unpartitioned} rows have no Purchase_Date and were not partitioned.")
+    write_manifest(root, manifest)
+    return manifest
+
+
+def append_month(df_new, df_time, root, replace=False):
+    # Add newly arrived rows to their month partitions; other partitions are untouched.
+    # Rows for a month that already exists are added as a new part file unless
+    # replace=True, which rewrites the month with only the new rows.
+    manifest = read_manifest(root)
+    dates = purchase_dates_for(df_new, df_time)
+    for (year, month), index in dates.groupby([dates.dt.year, dates.dt.month]).groups.items():
+        key = partition_key(year, month)
+        if key in manifest['partitions']:
+            action = 'Replacing' if replace else f'Adding {len(index)} rows to'
+            print(f"{action} existing partition {key}")
+        write_partition(root, df_new.loc[index], dates.loc[index], year, month, manifest, replace)
+    write_manifest(root, manifest)
+    return manifest
+
+
+def prune_partitions(manifest, years=None, months=None, equals=None, ranges=None):
+    # Partition pruning on year/month, then zone-map skipping on the partition stats:
+    #   equals: {column: value} must appear in the partition's category counts
+    #   ranges: {column: (low, high)} must overlap the partition's min/max
+    selected = []
+    for key, partition in sorted(manifest['partitions'].items()):
+        if years and partition['year'] not in years:
+            continue
+        if months and partition['month'] not in months:
+            continue
+        if any(column in partition['categories'] and str(value) not in partition['categories'][column]
+               for column, value in (equals or {}).items()):
+            continue
+        if any(column in partition['ranges'] and (high < partition['ranges'][column][0] or low > partition['ranges'][column][1])
+               for column, (low, high) in (ranges or {}).items()):
+            continue
+        selected.append(partition)
+    return selected
+
+
+def read_partitions(root, years=None, months=None, equals=None, ranges=None, **read_csv_args):
+    # Read only the partitions that can contain matching rows
+    manifest = read_manifest(root)
+    partitions = prune_partitions(manifest, years, months, equals, ranges)
+    frames = [pd.read_csv(os.path.join(root, path), **read_csv_args) for p in partitions for path in partition_paths(p)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write fact_transactions as year/month partitions.')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Folder with the star schema CSV files')
+    parser.add_argument('--append', metavar='CSV', help='Append the rows of this fact CSV instead of rebuilding')
+    parser.add_argument('--replace', action='store_true',
+                        help='With --append, replace the existing partitions of the appended months instead of adding to them')
+    args = parser.parse_args()
+
+    root = os.path.join(args.data_dir, PARTITIONS_DIR)
+    df_time = pd.read_csv(os.path.join(args.data_dir, 'dim_time.csv'), usecols=['Time_ID', 'Purchase_Date'])
+    if args.append:
+        manifest = append_month(pd.read_csv(args.append), df_time, root, args.replace)
+    else:
+        manifest = write_partitions(pd.read_csv(os.path.join(args.data_dir, 'fact_transactions.csv')), df_time, root)
+    for key, partition in sorted(manifest['partitions'].items()):
+        print(f"{key}: {partition['rows']} rows")
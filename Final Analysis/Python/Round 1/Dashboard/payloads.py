@@ -0,0 +1,108 @@
+import gzip
+import json
+import threading
+
+# Compact, compressed callback responses.
+#  - compact_figure() drops the parts of a figure's template that cannot apply
+#    to it (styling for trace types and subplot kinds it does not contain), which
+#    is most of every serialized figure; the rendered chart is unchanged
+#  - numeric arrays are already sent as base64 typed arrays ({'dtype', 'bdata'})
+#    by plotly's serializer, which also uses orjson when it is installed
+#  - install() adds a Flask after_request hook that gzip/brotli-compresses JSON
+#    responses above a size threshold and records bytes per callback output
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+
+# Template layout entries only used by traces of these types
+SUBPLOT_TRACE_TYPES = {
+    'geo': {'scattergeo', 'choropleth'},
+    'polar': {'scatterpolar', 'scatterpolargl', 'barpolar'},
+    'scene': {'scatter3d', 'surface', 'mesh3d', 'cone', 'streamtube', 'volume', 'isosurface'},
+    'ternary': {'scatterternary'}
+}
+
+
+def loads(payload):
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+def compact_figure(figure):
+    # figure: parsed figure JSON; the template is trimmed in place
+    template = figure.get('layout', {}).get('template')
+    if not template:
+        return figure
+    trace_types = {trace.get('type', 'scatter') for trace in figure.get('data', [])}
+    if 'data' in template:
+        template['data'] = {t: styles for t, styles in template['data'].items() if t in trace_types}
+    if 'layout' in template:
+        for key, used_by in SUBPLOT_TRACE_TYPES.items():
+            if not trace_types & used_by:
+                template['layout'].pop(key, None)
+    return figure
+
+
+def compress_body(body, accept_encoding, level=6):
+    # (compressed body, encoding) for the best encoding the client accepts, else (body, None)
+    accepted = {part.split(';')[0].strip() for part in (accept_encoding or '').lower().split(',')}
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(body, quality=5), 'br'
+    if 'gzip' in accepted:
+        return gzip.compress(body, compresslevel=level), 'gzip'
+    return body, None
+
+
+class PayloadStats:
+    # Response bytes per callback output, before and after compression
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outputs = {}
+
+    def record(self, output, raw_bytes, sent_bytes):
+        with self.lock:
+            stats = self.outputs.setdefault(output, {'calls': 0, 'raw_bytes': 0, 'sent_bytes': 0})
+            stats['calls'] += 1
+            stats['raw_bytes'] += raw_bytes
+            stats['sent_bytes'] += sent_bytes
+
+    def summary(self):
+        with self.lock:
+            return {output: {'calls': s['calls'],
+                             'raw_bytes_mean': round(s['raw_bytes'] / s['calls']),
+                             'sent_bytes_mean': round(s['sent_bytes'] / s['calls'])}
+                    for output, s in self.outputs.items()}
+
+
+def install(server, compress=True, min_bytes=COMPRESS_MIN_BYTES, stats=None):
+    from flask import request
+
+    @server.after_request
+    def compress_response(response):
+        # Streamed responses (e.g. /export) and already-encoded bodies are left alone
+        if response.direct_passthrough or response.headers.get('Content-Encoding') or response.mimetype != 'application/json':
+            return response
+        body = response.get_data()
+        sent = len(body)
+        if compress and sent >= min_bytes:
+            data, encoding = compress_body(body, request.headers.get('Accept-Encoding'))
+            if encoding:
+                response.set_data(data)
+                response.headers['Content-Encoding'] = encoding
+                response.headers.add('Vary', 'Accept-Encoding')
+                sent = len(data)
+        if stats is not None and request.path.endswith('/_dash-update-component'):
+            payload = request.get_json(silent=True) or {}
+            stats.record(payload.get('output', '?'), len(body), sent)
+        return response
+
+    return compress_response
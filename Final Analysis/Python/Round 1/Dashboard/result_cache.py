@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+# Shared on-disk cache for chart results.
+# Every server process on the machine opens the same SQLite file, so a
+# (section, filters) result computed by one worker is reused by the others.
+#  - entries are tagged with the dataset version and ignored once it changes
+#  - entries expire after `ttl` seconds; least recently used entries are
+#    evicted when the total size goes over `max_bytes`
+#  - get_or_compute() takes a short lease on the key, so concurrent misses for
+#    the same key compute it once while the other callers wait for the result
+
+
+def cache_key(*parts):
+    return hashlib.sha1(json.dumps(parts, default=str, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, path, max_bytes=256 * 2**20, ttl=3600, lock_timeout=60, poll_interval=0.05):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.owner = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, version TEXT, value BLOB, '
+                       'size INTEGER, created REAL, accessed REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            db.execute('CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT, expires REAL)')
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call, so the cache is safe across threads and processes
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def get(self, key, version):
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute('SELECT version, value, created FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] != version or now - row[2] > self.ttl:
+                db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                return None
+            db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+            return row[1]
+
+    def set(self, key, version, value):
+        now = time.time()
+        with self._connect() as db:
+            db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                       (key, version, value, len(value), now, now))
+            self._evict(db, now)
+
+    def _evict(self, db, now):
+        db.execute('DELETE FROM entries WHERE created < ?', (now - self.ttl,))
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall():
+            db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _acquire(self, key):
+        now = time.time()
+        with self._connect() as db:
+            db.execute('DELETE FROM locks WHERE key = ? AND expires < ?', (key, now))
+            cursor = db.execute('INSERT OR IGNORE INTO locks VALUES (?, ?, ?)', (key, self.owner, now + self.lock_timeout))
+            return cursor.rowcount == 1
+
+    def _release(self, key):
+        with self._connect() as db:
+            db.execute('DELETE FROM locks WHERE key = ? AND owner = ?', (key, self.owner))
+
+    def get_or_compute(self, key, version, compute):
+        # compute() must return bytes or str; the cached bytes are returned
+        value = self.get(key, version)
+        if value is not None:
+            return value
+        deadline = time.time() + self.lock_timeout
+        while True:
+            if self._acquire(key):
+                try:
+                    value = self.get(key, version)
+                    if value is None:
+                        value = compute()
+                        value = value.encode('utf-8') if isinstance(value, str) else value
+                        self.set(key, version, value)
+                    return value
+                finally:
+                    self._release(key)
+            # Another process is computing this key; wait for its result
+            time.sleep(self.poll_interval)
+            value = self.get(key, version)
+            if value is not None:
+                return value
+            if time.time() > deadline:
+                value = compute()
+                return value.encode('utf-8') if isinstance(value, str) else value
+
+    def clear(self):
+        with self._connect() as db:
+            db.execute('DELETE FROM entries')
+            db.execute('DELETE FROM locks')
+
+    def stats(self):
+        with self._connect() as db:
+            count, size = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {'entries': count, 'bytes': size, 'max_bytes': self.max_bytes, 'ttl': self.ttl}
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from aggregations import FILTER_COLUMNS, selected_filters
+
+# Per-day prefix sums for date-range totals and daily series.
+#
+# The fact rows are split into cells, one per combination of the sidebar filter
+# values present in the data (station, ticket type, railcard, payment, ...).
+# Filter columns that are a part of the indexed date itself (Month of the
+# purchase date) are not cell dimensions: they select days, and are applied
+# as date windows.
+#
+# Only the (cell, day) entries that have rows are stored, sorted by cell then
+# day, with running totals over the entries of
+#   count    - number of transactions
+#   revenue  - sum of Price
+#   refunds  - number of transactions with Refund_Request == 'Yes'
+# so the size grows with the active cell-days, not with cells x history.
+# The total of a measure for one cell over days [low, high) is
+#   prefix[position(cell, high)] - prefix[position(cell, low)]
+# where position() is a binary search in the sorted entry keys: KPI totals cost
+# two searches per matching cell and date window whatever the history length.
+
+# Filter column -> date attribute it equals, when it is derived from the indexed date
+DATE_PART_COLUMNS = {'Month': 'month'}
+
+
+def narrow_integers(values):
+    # int32 when the values fit, as the running totals of counts and prices usually do
+    if pd.api.types.is_integer_dtype(values) and (len(values) == 0 or np.abs(values).max() < 2**31):
+        return values.astype(np.int32)
+    return values
+
+
+class PrefixSumIndex:
+
+    def __init__(self, df, date_column, value_column='Price', refund_column='Refund_Request'):
+        self.date_column = date_column
+        days = pd.to_datetime(df[date_column], errors='coerce').dt.normalize()
+        valid = days.notna().to_numpy()
+        rows, days = df[valid], days[valid]
+        self.start = days.min() if len(days) else pd.Timestamp(0)
+        self.days = (days.max() - self.start).days + 1 if len(days) else 0
+        self.date_parts = {column: part for column, part in DATE_PART_COLUMNS.items()
+                           if column in rows.columns and (getattr(days.dt, part) == rows[column]).all()}
+        self.dimensions = [c for c in FILTER_COLUMNS.values() if c in df.columns and c not in self.date_parts]
+        calendar = self.start + pd.to_timedelta(np.arange(self.days), unit='D')
+        self.day_parts = {column: np.asarray(getattr(calendar, part)) for column, part in self.date_parts.items()}
+
+        # Cell of every row and the filter values of every cell
+        if self.dimensions:
+            codes = rows.groupby(self.dimensions, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+        else:
+            codes = np.zeros(len(rows), dtype=np.int64)
+        first = np.unique(codes, return_index=True)[1]
+        self.cells = rows[self.dimensions].iloc[first].reset_index(drop=True)
+
+        # One entry per (cell, day) with rows; prefix[0] is zero
+        keys = codes.astype(np.int64) * self.days + (days - self.start).dt.days.to_numpy()
+        keys, entry = np.unique(keys, return_inverse=True)
+        self.keys = narrow_integers(keys)
+        values = {'count': None}
+        if value_column in rows.columns:
+            values['revenue'] = rows[value_column].fillna(0)
+        if refund_column in rows.columns:
+            values['refunds'] = (rows[refund_column] == 'Yes').astype(np.int64)
+        self.prefix = {}
+        for measure, weights in values.items():
+            sums = np.bincount(entry, weights=None if weights is None else weights.to_numpy(dtype=float),
+                               minlength=len(keys))
+            if weights is None or pd.api.types.is_integer_dtype(weights):
+                # Keep integer measures integer, as a group-by sum would
+                sums = sums.astype(np.int64)
+            self.prefix[measure] = narrow_integers(np.concatenate([[0], np.cumsum(sums)]))
+
+    @property
+    def nbytes(self):
+        return (self.keys.nbytes + sum(prefix.nbytes for prefix in self.prefix.values())
+                + sum(parts.nbytes for parts in self.day_parts.values())
+                + int(self.cells.memory_usage(deep=True).sum()))
+
+    def _cells(self, filters):
+        # Indices of the cells matching the sidebar filters
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, value in selected_filters(*filters).items():
+            if column in self.cells.columns:
+                mask &= (self.cells[column] == value).to_numpy()
+        return np.flatnonzero(mask)
+
+    def _days(self, filters, start=None, end=None):
+        # Boolean per day: inside [start, end] and matching the date-part filters
+        allowed = np.zeros(self.days, dtype=bool)
+        first = 0 if start is None else (pd.Timestamp(start).normalize() - self.start).days
+        last = self.days - 1 if end is None else (pd.Timestamp(end).normalize() - self.start).days
+        allowed[max(first, 0):max(min(last, self.days - 1) + 1, 0)] = True
+        for column, value in selected_filters(*filters).items():
+            if column in self.day_parts:
+                allowed &= self.day_parts[column] == value
+        return allowed
+
+    def totals(self, filters, start=None, end=None):
+        # Measure -> total over the date window for the filtered rows
+        cells = self._cells(filters)
+        edges = np.diff(np.concatenate([[0], self._days(filters, start, end).astype(np.int8), [0]]))
+        base = cells.astype(np.int64)[:, None] * self.days
+        low = np.searchsorted(self.keys, base + np.flatnonzero(edges == 1))
+        high = np.searchsorted(self.keys, base + np.flatnonzero(edges == -1))
+        return {measure: float(np.subtract(prefix[high], prefix[low], dtype=np.float64).sum())
+                for measure, prefix in self.prefix.items()}
+
+    def daily(self, filters, measure, name, start=None, end=None):
+        # Per-day values of one measure, for the days that have rows (like a group-by on the date)
+        cell_of_entry, day_of_entry = np.divmod(self.keys.astype(np.int64), max(self.days, 1))
+        entries = np.isin(cell_of_entry, self._cells(filters)) & self._days(filters, start, end)[day_of_entry]
+        days = day_of_entry[entries]
+        counts = np.bincount(days, weights=np.diff(self.prefix['count'])[entries], minlength=self.days).astype(np.int64)
+        values = counts if measure == 'count' else np.bincount(
+            days, weights=np.diff(self.prefix[measure])[entries], minlength=self.days)
+        if measure != 'count' and self.prefix[measure].dtype.kind == 'i':
+            values = np.rint(values).astype(np.int64)
+        present = counts > 0
+        dates = self.start + pd.to_timedelta(np.flatnonzero(present), unit='D')
+        return pd.DataFrame({self.date_column: dates, name: values[present]})
@@ -0,0 +1,294 @@
+import argparse
+import json
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# One-pass profile of a raw extract (e.g. railway.csv).
+# Replaces the notebook's separate info(), describe(), isnull().sum(),
+# duplicated().sum() and per-column value_counts() cells: the file is read once
+# in chunks and every column statistic is updated from the same chunk.
+#  - null counts, numeric summaries (Welford merge) and date ranges are exact
+#  - distinct counts and top-K values are exact until a column has more than
+#    `exact_limit` distinct values, then switch to a HyperLogLog sketch and a
+#    bounded heavy-hitter table
+#  - quartiles come from a fixed-size random sample of each numeric column
+#  - duplicate rows are counted exactly from 64-bit row hashes while there are
+#    at most `duplicate_limit` distinct rows; past that only rows whose hash ends
+#    in k zero bits are tracked (both copies of a duplicate share the hash, so
+#    they are kept or dropped together) and the count is scaled by 2^k, which
+#    keeps memory bounded on arbitrarily large files (reported as approximate)
+#
+# Example:
+#   python profile_dataset.py "../../Excel/Datasets/railway.csv" --json profile.json
+
+HLL_PRECISION = 14
+RESERVOIR_SIZE = 10000
+DUPLICATE_LIMIT = 2000000
+
+
+def hash_values(values):
+    # 64-bit hashes that do not depend on how a chunk happened to be typed:
+    # numbers hash as float64 (5 and 5.0 alike), everything else as text
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.util.hash_array(values.to_numpy(dtype=np.float64))
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+class HyperLogLog:
+    # Distinct-count sketch over 64-bit hashes (about 1% error at p=14)
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Position of the first set bit in the remaining 64 - p bits
+        _, exponent = np.frexp(remaining.astype(np.float64))
+        rank = np.where(remaining > 0, (64 - self.precision) - exponent + 1, 64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class ColumnProfile:
+
+    def __init__(self, name, top_k, exact_limit):
+        self.name = name
+        self.top_k = top_k
+        self.exact_limit = exact_limit
+        self.count = 0
+        self.nulls = 0
+        self.dtypes = set()
+        # Frequencies: exact Counter, or a bounded heavy-hitter table once too large
+        self.counts = Counter()
+        self.exact = True
+        self.hll = None
+        # Numeric summary
+        self.numeric = True
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.reservoir = np.empty(0)
+        self.reservoir_keys = np.empty(0)
+        # Date range
+        self.is_date = None
+        self.date_min = None
+        self.date_max = None
+
+    def update(self, series, rng):
+        self.count += len(series)
+        self.dtypes.add(str(series.dtype))
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        if values.empty:
+            return
+        self._update_frequencies(values)
+        if self.numeric and pd.api.types.is_numeric_dtype(values):
+            self._update_numeric(values.to_numpy(dtype=np.float64), rng)
+        else:
+            self.numeric = False
+            self._update_dates(values)
+
+    def _update_frequencies(self, values):
+        chunk_counts = values.value_counts()
+        if self.hll is not None:
+            self.hll.add_hashes(hash_values(values))
+        self.counts.update(dict(zip(chunk_counts.index, chunk_counts.to_numpy().tolist())))
+        if self.exact and len(self.counts) > self.exact_limit:
+            # Too many distinct values to keep exactly: seed the sketch with what we have
+            self.exact = False
+            self.hll = HyperLogLog()
+            self.hll.add_hashes(hash_values(list(self.counts)))
+        if not self.exact and len(self.counts) > 10 * self.top_k:
+            self.counts = Counter(dict(self.counts.most_common(10 * self.top_k)))
+
+    def _update_numeric(self, values, rng):
+        # Merge this chunk's count/mean/M2 into the running totals (Chan et al.)
+        n, mean = len(values), values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        delta = mean - self.mean
+        total = self.n + n
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+        self.minimum = values.min() if self.minimum is None else min(self.minimum, values.min())
+        self.maximum = values.max() if self.maximum is None else max(self.maximum, values.max())
+        # Bottom-k sampling: keep the values with the smallest random keys
+        keys = np.concatenate([self.reservoir_keys, rng.random(n)])
+        pool = np.concatenate([self.reservoir, values])
+        if len(pool) > RESERVOIR_SIZE:
+            keep = np.argpartition(keys, RESERVOIR_SIZE)[:RESERVOIR_SIZE]
+            keys, pool = keys[keep], pool[keep]
+        self.reservoir_keys, self.reservoir = keys, pool
+
+    def _update_dates(self, values):
+        if self.is_date is None:
+            # Decide from the first chunk: mostly parseable and looks like a date, not a clock time
+            sample = values.astype(str).head(1000)
+            parsed = pd.to_datetime(sample, errors='coerce', format='mixed')
+            self.is_date = bool(parsed.notna().mean() > 0.95 and sample.str.contains(r'[-/]').mean() > 0.95)
+        if not self.is_date:
+            return
+        parsed = pd.to_datetime(values.astype(str), errors='coerce', format='mixed').dropna()
+        if parsed.empty:
+            return
+        self.date_min = parsed.min() if self.date_min is None else min(self.date_min, parsed.min())
+        self.date_max = parsed.max() if self.date_max is None else max(self.date_max, parsed.max())
+
+    def report(self):
+        non_null = self.count - self.nulls
+        result = {
+            'dtype': sorted(self.dtypes)[0] if len(self.dtypes) == 1 else sorted(self.dtypes),
+            'count': non_null,
+            'nulls': self.nulls,
+            'null_pct': round(100 * self.nulls / self.count, 2) if self.count else 0.0,
+            'distinct': len(self.counts) if self.exact else self.hll.estimate(),
+            'distinct_exact': self.exact,
+            'top': [{'value': str(v), 'count': int(c)} for v, c in self.counts.most_common(self.top_k)],
+            'top_exact': self.exact
+        }
+        if self.numeric and self.n:
+            quartiles = np.percentile(self.reservoir, [25, 50, 75])
+            result['numeric'] = {
+                'mean': float(self.mean),
+                'std': float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else None,
+                'min': float(self.minimum),
+                '25%': float(quartiles[0]),
+                '50%': float(quartiles[1]),
+                '75%': float(quartiles[2]),
+                'max': float(self.maximum),
+                'quartiles_exact': self.n <= RESERVOIR_SIZE
+            }
+        if self.is_date and self.date_min is not None:
+            result['date_range'] = [str(self.date_min), str(self.date_max)]
+        return result
+
+
+class DatasetProfiler:
+
+    def __init__(self, top_k=10, exact_limit=100000, duplicates=True, seed=0, duplicate_limit=DUPLICATE_LIMIT):
+        self.top_k = top_k
+        self.exact_limit = exact_limit
+        self.duplicates = duplicates
+        self.duplicate_limit = duplicate_limit
+        self.rng = np.random.default_rng(seed)
+        self.columns = {}
+        self.rows = 0
+        # Distinct row hashes seen (sorted) with their row counts, plus hashes not merged yet
+        self.row_hashes = np.empty(0, dtype=np.uint64)
+        self.row_counts = np.empty(0, dtype=np.int64)
+        self.pending = []
+        self.pending_rows = 0
+        self.sample_bits = 0
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for name in chunk.columns:
+            if name not in self.columns:
+                self.columns[name] = ColumnProfile(name, self.top_k, self.exact_limit)
+            self.columns[name].update(chunk[name], self.rng)
+        if self.duplicates:
+            self._update_duplicates(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+
+    def _in_sample(self, hashes):
+        # Rows whose hash ends in `sample_bits` zero bits
+        return (hashes & np.uint64((1 << self.sample_bits) - 1)) == 0
+
+    def _update_duplicates(self, hashes):
+        # Chunks are buffered and merged once the buffer is as large as the table
+        if self.sample_bits:
+            hashes = hashes[self._in_sample(hashes)]
+        self.pending.append(hashes)
+        self.pending_rows += len(hashes)
+        if self.pending_rows > max(self.duplicate_limit, len(self.row_hashes)):
+            self._merge_duplicates()
+
+    def _merge_duplicates(self):
+        if not self.pending:
+            return
+        hashes = np.concatenate([self.row_hashes] + self.pending)
+        weights = np.concatenate([self.row_counts, np.ones(self.pending_rows, dtype=np.int64)])
+        self.pending, self.pending_rows = [], 0
+        self.row_hashes, inverse = np.unique(hashes, return_inverse=True)
+        self.row_counts = np.bincount(inverse, weights=weights).astype(np.int64)
+        while len(self.row_hashes) > self.duplicate_limit:
+            # Too many distinct rows: track only the half of the hash space with one more zero bit
+            self.sample_bits += 1
+            keep = self._in_sample(self.row_hashes)
+            self.row_hashes, self.row_counts = self.row_hashes[keep], self.row_counts[keep]
+
+    def report(self):
+        duplicates = None
+        if self.duplicates:
+            self._merge_duplicates()
+            duplicates = int((self.row_counts - 1).sum()) << self.sample_bits
+        return {
+            'rows': self.rows,
+            'columns': len(self.columns),
+            'duplicate_rows': duplicates,
+            'duplicate_rows_exact': self.sample_bits == 0,
+            'profile': {name: column.report() for name, column in self.columns.items()}
+        }
+
+
+def profile_csv(path, chunksize=100000, top_k=10, exact_limit=100000, duplicates=True,
+                duplicate_limit=DUPLICATE_LIMIT, **read_csv_args):
+    profiler = DatasetProfiler(top_k=top_k, exact_limit=exact_limit, duplicates=duplicates, duplicate_limit=duplicate_limit)
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_args):
+        profiler.update(chunk)
+    return profiler.report()
+
+
+def print_report(report):
+    duplicates = report['duplicate_rows']
+    if duplicates is not None and not report['duplicate_rows_exact']:
+        duplicates = f"~{duplicates} (approx., sampled row hashes)"
+    print(f"Rows: {report['rows']}  Columns: {report['columns']}  Duplicate rows: {duplicates}")
+    for name, column in report['profile'].items():
+        distinct = column['distinct'] if column['distinct_exact'] else f"~{column['distinct']}"
+        print(f"\n{name} ({column['dtype']}): nulls={column['nulls']} ({column['null_pct']}%), distinct={distinct}")
+        if 'numeric' in column:
+            summary = column['numeric']
+            print("  " + ", ".join(f"{k}={v:.2f}" for k, v in summary.items() if isinstance(v, float)))
+        if 'date_range' in column:
+            print(f"  range: {column['date_range'][0]} .. {column['date_range'][1]}")
+        top = ", ".join(f"{t['value']} ({t['count']})" for t in column['top'])
+        print(f"  top{'' if column['top_exact'] else ' (approx.)'}: {top}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile a raw CSV extract in one chunked pass.')
+    parser.add_argument('path', help='CSV file to profile')
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--exact-limit', type=int, default=100000, help='Distinct values kept exactly per column')
+    parser.add_argument('--no-duplicates', action='store_true', help='Skip the duplicate-row count')
+    parser.add_argument('--duplicate-limit', type=int, default=DUPLICATE_LIMIT,
+                        help='Distinct rows tracked exactly for the duplicate count; above it the count is sampled')
+    parser.add_argument('--json', metavar='PATH', help='Also write the report as JSON')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = profile_csv(args.path, args.chunksize, args.top_k, args.exact_limit, not args.no_duplicates,
+                         args.duplicate_limit)
+    print_report(report)
+    print(f"\nProfiled in one pass in {time.perf_counter() - start:.2f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, default=str)